@@ -0,0 +1,217 @@
+# app/cli.py
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+from datetime import datetime
+from app.utils import data_utils
+from app.utils.data_utils import get_storage_codec, get_storage_path
+from app.utils.history_utils import HistoryColumns, day_to_date
+from app.utils.storage_backends import EventLogBackend, create_backend, migrate_store
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    """Copy all users from one storage backend into another."""
+    source = create_backend(args.source, args.source_path or get_storage_path(args.source))
+    destination = create_backend(args.dest, args.dest_path or get_storage_path(args.dest), get_storage_codec())
+    try:
+        copied = migrate_store(source, destination)
+        print(f"✅ Migrated {copied} users from {args.source} to {args.dest}")
+        return 0
+    finally:
+        source.close()
+        destination.close()
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    """Rewrite a file-based store with a different codec."""
+    backend_name = args.backend
+    path = args.path or get_storage_path(backend_name)
+    backend = create_backend(backend_name, path, args.codec)
+    try:
+        data = backend.load_all()
+        backend.save_all(data)
+        print(f"✅ Rewrote {len(data.get('users', {}))} users in {path} with the {args.codec} codec")
+        return 0
+    finally:
+        backend.close()
+
+def _parse_time(value: str) -> float:
+    """Accept a unix timestamp or an ISO 8601 date/time (naive values are local time)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def cmd_restore(args: argparse.Namespace) -> int:
+    """Rebuild the store as it was at a moment in time from the event log."""
+    events = EventLogBackend(args.path or get_storage_path("eventlog"))
+    try:
+        timestamp = _parse_time(args.at) if args.at else datetime.now().timestamp()
+        state = events.state_at(timestamp)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    destination = create_backend(args.dest, args.dest_path, get_storage_codec())
+    try:
+        destination.save_all(state)
+    finally:
+        destination.close()
+    print(f"✅ Restored {len(state['users'])} users as of {datetime.fromtimestamp(timestamp)} into {args.dest_path}")
+    return 0
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    """Move old daily closes, and optionally inactive users, out of the hot store now."""
+    tiered = data_utils.tier_history(args.hot_days, args.period)
+    print(f"✅ Archived old history for {tiered} users")
+    if args.inactive_days is not None:
+        moved = data_utils.archive_inactive_users(args.inactive_days)
+        print(f"✅ Moved {moved} inactive users to cold storage")
+    return 0
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    """Check every record in a store can be read, without loading it all at once."""
+    path = args.path or get_storage_path(args.backend)
+    backend = create_backend(args.backend, path)
+    try:
+        report = backend.verify()
+    finally:
+        backend.close()
+    for error in report["errors"]:
+        print(f"❌ {error}")
+    if report["errors"]:
+        print(f"Found {len(report['errors'])} problems in {path} ({report['records']} readable records)")
+        return 1
+    print(f"✅ {path}: {report['records']} records verified")
+    return 0
+
+def _stress_worker(backend_name: str, path: str, directory: str, worker: int, updates: int, flush_interval: float) -> None:
+    """One bot-like process hammering the shared store through the normal storage API."""
+    # Keep every file the bot would create inside the scratch directory, and background jobs quiet
+    os.environ.update({
+        "HISTORY_LOG_FILE": os.path.join(directory, "history_log.jsonl"),
+        "HISTORY_ARCHIVE_DIR": os.path.join(directory, "history_archive"),
+        "USER_ARCHIVE_DIR": os.path.join(directory, "user_archive"),
+        "WARM_SNAPSHOT_FILE": "",
+        "HISTORY_TIER_INTERVAL": "0",
+    })
+    data_utils.set_backend(create_backend(backend_name, path))
+    data_utils.init_storage(flush_interval)
+    for i in range(updates):
+        # Field updates through the cache, to a private user and to a user every worker shares
+        data_utils.update_user_data(f"stress-{worker}", {"last_update": i})
+        data_utils.update_user_data("stress-shared", {f"worker_{worker}": i})
+        # One closing balance per iteration on a date no other worker uses
+        data_utils.append_history("stress-shared", day_to_date(worker * updates + i), float(i))
+        # Read-modify-write through the calls a handler's UserSession makes; like a user's own
+        # updates it is serial per user, while the other workers' writes force flushes and revalidation
+        counter = data_utils.get_user_data(f"stress-counter-{worker}")
+        data_utils.commit_user_data(f"stress-counter-{worker}", {"count": counter.get("count", 0) + 1})
+    data_utils.shutdown_storage()
+
+def cmd_stress(args: argparse.Namespace) -> int:
+    """Run several worker processes against one store and check no update was lost."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store.db" if args.backend == "sqlite" else "store")
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(
+                target=_stress_worker,
+                args=(args.backend, path, directory, worker, args.updates, args.flush_interval)
+            )
+            for worker in range(args.workers)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        if any(process.exitcode != 0 for process in workers):
+            print("❌ A worker process failed")
+            return 1
+
+        backend = create_backend(args.backend, path)
+        try:
+            users = backend.load_all()["users"]
+        finally:
+            backend.close()
+
+    last = args.updates - 1
+    shared = users.get("stress-shared", {})
+    problems = []
+    for worker in range(args.workers):
+        count = users.get(f"stress-counter-{worker}", {}).get("count", 0)
+        if count != args.updates:
+            problems.append(f"stress-counter-{worker} is {count}, expected {args.updates}")
+        if users.get(f"stress-{worker}", {}).get("last_update") != last:
+            problems.append(f"stress-{worker} lost its last update")
+        if shared.get(f"worker_{worker}") != last:
+            problems.append(f"shared user lost worker {worker}'s last field update")
+    history = HistoryColumns.decode(shared.get("history"))
+    if len(history) != args.workers * args.updates:
+        problems.append(f"shared history has {len(history)} entries, expected {args.workers * args.updates}")
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        return 1
+    print(f"✅ {args.workers} workers x {args.updates} updates on the {args.backend} backend: no lost updates")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the storage maintenance command line parser."""
+    parser = argparse.ArgumentParser(description="Compounding Tracker storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Copy user data between storage backends")
+    migrate.add_argument("--source", default="json", help="Source backend (default: json)")
+    migrate.add_argument("--source-path", help="Source file (default: configured path)")
+    migrate.add_argument("--dest", default="sqlite", help="Destination backend (default: sqlite)")
+    migrate.add_argument("--dest-path", help="Destination file (default: configured path)")
+    migrate.set_defaults(func=cmd_migrate)
+
+    convert = subparsers.add_parser("convert", help="Re-encode a file-based store with another codec")
+    convert.add_argument("--codec", required=True, help="Target codec: json, json-pretty, orjson or msgpack")
+    convert.add_argument("--backend", default="json", choices=["json", "sharded"], help="Store layout (default: json)")
+    convert.add_argument("--path", help="Store file or directory (default: configured path)")
+    convert.set_defaults(func=cmd_convert)
+
+    restore = subparsers.add_parser("restore", help="Replay the event log up to a point in time")
+    restore.add_argument("--at", help="Unix timestamp or ISO date/time (default: now)")
+    restore.add_argument("--path", help="Event log directory (default: configured path)")
+    restore.add_argument("--dest", default="json", help="Backend to write the result to (default: json)")
+    restore.add_argument("--dest-path", required=True, help="Where to write the restored store")
+    restore.set_defaults(func=cmd_restore)
+
+    archive = subparsers.add_parser("archive", help="Move old daily closes to the history archive")
+    archive.add_argument("--hot-days", type=int, help="Days kept inline (default: HISTORY_HOT_DAYS)")
+    archive.add_argument("--period", choices=["week", "month"], help="Rollup period (default: HISTORY_ROLLUP_PERIOD)")
+    archive.add_argument("--inactive-days", type=int, help="Also move users without a close for this many days to cold storage")
+    archive.set_defaults(func=cmd_archive)
+
+    verify = subparsers.add_parser("verify", help="Validate a store record by record")
+    verify.add_argument("--backend", default="json", help="Store layout (default: json)")
+    verify.add_argument("--path", help="Store file or directory (default: configured path)")
+    verify.set_defaults(func=cmd_verify)
+
+    stress = subparsers.add_parser("stress", help="Check concurrent worker processes lose no updates")
+    stress.add_argument("--backend", default="json", help="Backend to test (default: json)")
+    stress.add_argument("--workers", type=int, default=4)
+    stress.add_argument("--updates", type=int, default=200, help="Update rounds per worker")
+    stress.add_argument("--flush-interval", type=float, default=0.05, help="Cache flush interval in each worker")
+    stress.set_defaults(func=cmd_stress)
+
+    return parser
+
+def main(argv=None) -> int:
+    """Entry point for ``python -m app.cli``."""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
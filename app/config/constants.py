@@ -20,8 +20,34 @@ BOT_VERSION = "2.0.0"
 
 # File paths
 DATA_FILE = "user_data.json"
+SQLITE_FILE = "user_data.db"
+SHARD_DIR = "user_data"
+SEGMENT_DIR = "user_segments"
+EVENT_LOG_DIR = "user_events"
+HISTORY_ARCHIVE_DIR = "history_archive"
+USER_ARCHIVE_DIR = "user_archive"
 FONT_DIR = "assets/fonts"
 
+# Storage settings (can be overridden with environment variables of the same name)
+STORAGE_BACKEND = "json"  # "json", "sqlite", "sharded", "segment" or "eventlog"
+STORAGE_CODEC = "json"    # File encoding: "json", "json-pretty", "orjson" or "msgpack"
+STORAGE_WORKERS = 4  # Threads that run blocking storage calls for async handlers
+CACHE_FLUSH_INTERVAL = 5.0  # Seconds a changed user may wait in memory before being written
+CACHE_MAX_DIRTY = 500       # Flush early once this many users are waiting to be written
+DURABILITY_MODE = "interval"  # "none", "interval" (fsync each cache flush) or "group" (ack after a group fsync)
+GROUP_COMMIT_WINDOW = 0.05    # Seconds writes wait to share one fsynced commit in "group" mode
+HISTORY_LOG_FILE = "history_log.jsonl"  # Append-only log of closing balances
+HISTORY_COMPACT_INTERVAL = 60.0  # Seconds between folding the history log into the store
+HISTORY_COMPACT_EVENTS = 1000    # Fold early once this many balance events are pending
+HISTORY_HOT_DAYS = 90            # Days of closes kept inline; older ones go to the archive (0 keeps all)
+HISTORY_ROLLUP_PERIOD = "month"  # Aggregates kept inline for archived days: "week" or "month"
+HISTORY_TIER_INTERVAL = 86400.0  # Seconds between archiving runs (0 disables)
+INACTIVE_USER_DAYS = 180         # Days without a close before a user moves to cold storage (0 disables)
+EVENT_SNAPSHOT_EVENTS = 10000    # "eventlog" backend: mutations per segment before a new snapshot
+EVENT_RETENTION_DAYS = 30        # "eventlog" backend: days of snapshots and mutations kept for restores
+WARM_SNAPSHOT_FILE = "cache_snapshot.bin"  # Decoded cache saved for fast restarts ("" disables)
+WARM_SNAPSHOT_INTERVAL = 300.0   # Seconds between warm snapshot saves while running (0: only on shutdown)
+
 # Reminder settings
 REMINDER_HOUR = 20  # 8 PM
 REMINDER_MINUTE = 0
@@ -36,4 +62,16 @@ PROFILE_PHOTO_SIZE = 100
 EXCELLENT_THRESHOLD = 1.0   # 100% or above
 GOOD_THRESHOLD = 0.8        # 80% or above
 WARNING_THRESHOLD = 0.5     # 50% or above
-# Below 50% is considered poor
\ No newline at end of file
+# Below 50% is considered poor
+
+# Calculation settings
+GROWTH_CACHE_SIZE = 128        # (rate, mode) growth factor tables kept in memory
+GROWTH_TABLE_MAX_DAYS = 36500  # Longest day range served from a table; longer ones are computed directly
+PROGRESS_CACHE_SIZE = 10000    # Users whose progress result is kept between /status calls
+CACHE_STATS_INTERVAL = 3600    # Seconds between log lines with growth table and progress cache hit rates
+PROJECTION_MAX_DAYS = 36500    # Targets further out than this (100 years) count as never reached
+SIMULATION_PATHS = 10000       # Monte Carlo paths per /simulate, fewer if the time budget runs out
+SIMULATION_TIME_BUDGET = 0.25  # Seconds a single simulation may run
+SIMULATION_WORKERS = 2         # Threads running simulations, kept apart from the storage pool
+SIMULATION_DEFAULT_DAYS = 365  # Horizon when the planned target date is unknown or already past
+SIMULATION_MAX_DAYS = 3650     # Longest horizon simulated
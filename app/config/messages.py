@@ -72,6 +72,38 @@ Please select your preferred language:
         "language_set": "✅ Language updated successfully!",
         "no_history": "❌ No history available to export. Start tracking with /close command.",
         "export_success": "✅ Your detailed progress report has been generated and sent!",
+
+        "projection_summary": """🔮 *Target Projection*
+
+💼 Current Balance: {current_balance}
+🎯 Target: {target_amount}
+
+📈 *At your planned rate ({planned_rate}% {mode}):*
+{planned}
+
+📊 *At your realized rate:*
+{realized}""",
+        "projection_eta": "📅 {date} ({days} days from your last close)",
+        "projection_reached": "🎉 Target already reached!",
+        "projection_never": "⚠️ The target is not reachable at this rate.",
+        "projection_realized_rate": "Realized rate: {rate}% per year (trend fit {fit}%)",
+        "projection_need_history": "ℹ️ Record at least {points} closing balances with /close to see your realized rate.",
+
+        "simulate_summary": """🎲 *Target Simulation*
+
+Based on {paths} simulated paths using your own daily swings (volatility {volatility}% per day):
+
+🎯 Chance of reaching {target_amount} by {date}: *{probability}%*
+
+📊 *Balance on {date}:*
+• Worst 5%: {p5}
+• Lower 25%: {p25}
+• Median: {p50}
+• Upper 25%: {p75}
+• Best 5%: {p95}""",
+        "simulate_need_history": "ℹ️ Record at least {points} closing balances with /close to run a simulation.",
+        "simulate_reached": "🎉 You have already reached your target, so there is nothing left to simulate.",
+        "simulate_zero_balance": "⚠️ Your last closing balance is zero, so there is nothing to simulate. Record a new balance with /close.",
         
         "stoploss_alert": """🚨 *STOP-LOSS ALERT!*
 
@@ -90,6 +122,7 @@ Please review your strategy and consider your next steps carefully.""",
 Time to record today's closing balance!
 
 Use /close to enter your current balance and track your progress.""",
+        "reminder_progress": "🎯 Today's target: {expected_balance}\n💼 Last close: {current_balance} {status_badge}",
 
         "cancel": "✅ Operation cancelled successfully.",
         "unknown_command": "❌ Unknown command. Use /help to see all available commands.",
@@ -104,6 +137,8 @@ Use /close to enter your current balance and track your progress.""",
 /status - View progress with visual card
 /settings - Access all bot settings
 /export - Download Excel progress report
+/projection - See when you will reach your target
+/simulate - Odds of reaching your target
 /language - Switch between Hindi/English
 /help - Show this help guide
 /reset - Reset all data (with confirmation)
@@ -245,6 +280,38 @@ Please check your target settings or use /reset if the issue persists."""
         "language_set": "✅ भाषा सफलतापूर्वक अपडेट की गई!",
         "no_history": "❌ निर्यात करने के लिए कोई इतिहास उपलब्ध नहीं। /close कमांड के साथ ट्रैकिंग शुरू करें।",
         "export_success": "✅ आपकी विस्तृत प्रगति रिपोर्ट जनरेट और भेजी गई है!",
+
+        "projection_summary": """🔮 *लक्ष्य अनुमान*
+
+💼 वर्तमान बैलेंस: {current_balance}
+🎯 लक्ष्य: {target_amount}
+
+📈 *आपकी योजनाबद्ध दर ({planned_rate}% {mode}) पर:*
+{planned}
+
+📊 *आपकी वास्तविक दर पर:*
+{realized}""",
+        "projection_eta": "📅 {date} (आपके पिछले क्लोज से {days} दिन)",
+        "projection_reached": "🎉 लक्ष्य पहले ही प्राप्त हो चुका है!",
+        "projection_never": "⚠️ इस दर पर लक्ष्य तक नहीं पहुंचा जा सकता।",
+        "projection_realized_rate": "वास्तविक दर: {rate}% प्रति वर्ष (ट्रेंड फिट {fit}%)",
+        "projection_need_history": "ℹ️ अपनी वास्तविक दर देखने के लिए /close के साथ कम से कम {points} क्लोजिंग बैलेंस रिकॉर्ड करें।",
+
+        "simulate_summary": """🎲 *लक्ष्य सिमुलेशन*
+
+आपके अपने दैनिक उतार-चढ़ाव (अस्थिरता {volatility}% प्रति दिन) के आधार पर {paths} सिमुलेटेड पथ:
+
+🎯 {date} तक {target_amount} तक पहुंचने की संभावना: *{probability}%*
+
+📊 *{date} को बैलेंस:*
+• सबसे खराब 5%: {p5}
+• निचले 25%: {p25}
+• मध्य: {p50}
+• ऊपरी 25%: {p75}
+• सबसे अच्छे 5%: {p95}""",
+        "simulate_need_history": "ℹ️ सिमुलेशन चलाने के लिए /close के साथ कम से कम {points} क्लोजिंग बैलेंस रिकॉर्ड करें।",
+        "simulate_reached": "🎉 आप अपना लक्ष्य पहले ही प्राप्त कर चुके हैं, इसलिए सिमुलेट करने के लिए कुछ नहीं बचा है।",
+        "simulate_zero_balance": "⚠️ आपका पिछला क्लोजिंग बैलेंस शून्य है, इसलिए सिमुलेट करने के लिए कुछ नहीं है। /close के साथ नया बैलेंस रिकॉर्ड करें।",
         
         "stoploss_alert": """🚨 *स्टॉप-लॉस अलर्ट!*
 
@@ -263,6 +330,7 @@ Please check your target settings or use /reset if the issue persists."""
 आज का क्लोजिंग बैलेंस रिकॉर्ड करने का समय!
 
 अपना वर्तमान बैलेंस दर्ज करने और अपनी प्रगति ट्रैक करने के लिए /close का उपयोग करें।""",
+        "reminder_progress": "🎯 आज का लक्ष्य: {expected_balance}\n💼 पिछला क्लोज: {current_balance} {status_badge}",
 
         "cancel": "✅ ऑपरेशन सफलतापूर्वक रद्द किया गया।",
         "unknown_command": "❌ अज्ञात कमांड। सभी उपलब्ध कमांड देखने के लिए /help का उपयोग करें।",
@@ -277,6 +345,8 @@ Please check your target settings or use /reset if the issue persists."""
 /status - विज़ुअल कार्ड के साथ प्रगति देखें
 /settings - सभी बॉट सेटिंग्स एक्सेस करें
 /export - एक्सेल प्रगति रिपोर्ट डाउनलोड करें
+/projection - देखें कि आप अपने लक्ष्य तक कब पहुंचेंगे
+/simulate - अपने लक्ष्य तक पहुंचने की संभावना देखें
 /language - हिंदी/अंग्रेजी के बीच स्विच करें
 /help - यह सहायता गाइड दिखाएं
 /reset - सभी डेटा रीसेट करें (पुष्टि के साथ)
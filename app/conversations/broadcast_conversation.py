@@ -1,14 +1,27 @@
 # app/conversations/broadcast_conversation.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import load_data, get_user_data, update_user_data
+from app.utils.data_utils import async_get_archived_user_ids, async_iter_users
+from app.utils.session_utils import with_user_session
 from app.config.constants import BROADCAST, OWNER_ID
 from app.config.messages import MESSAGES
 
+async def _send_broadcast(context: ContextTypes.DEFAULT_TYPE, uid: str, message: str) -> None:
+    try:
+        await context.bot.send_message(
+            chat_id=uid,
+            text=message,
+            parse_mode="Markdown"
+        )
+    except Exception as e:
+        print(f"Failed to send broadcast to {uid}: {e}")
+
+@with_user_session
 async def handle_broadcast_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process broadcast message input."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_id = session.user_id
+    user_data = session.data
     language = user_data.get("language", "en")
 
     if user_id != OWNER_ID:
@@ -27,18 +40,16 @@ async def handle_broadcast_input(update: Update, context: ContextTypes.DEFAULT_T
         )
         return BROADCAST
 
-    data = load_data()
-    for uid in data.keys():
-        try:
-            await context.bot.send_message(
-                chat_id=uid,
-                text=message,
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            print(f"Failed to send broadcast to {uid}: {e}")
+    sent = set()
+    async for uid, _ in async_iter_users():
+        sent.add(uid)
+        await _send_broadcast(context, uid, message)
+    # Users moved to cold storage for inactivity still get announcements; blocked ones can't receive them
+    for uid in await async_get_archived_user_ids(exclude_reasons=("blocked",)):
+        if uid not in sent:
+            await _send_broadcast(context, uid, message)
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         "✅ Message successfully broadcasted to all users!",
@@ -47,13 +58,14 @@ async def handle_broadcast_input(update: Update, context: ContextTypes.DEFAULT_T
 
     return ConversationHandler.END
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel broadcast process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
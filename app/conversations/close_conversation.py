@@ -3,15 +3,16 @@ from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from datetime import datetime
 import pytz
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.utils.calculation_utils import check_stoploss
 from app.config.constants import CLOSING
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_closing_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process closing balance input from user."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     text = update.message.text.strip()
 
@@ -32,15 +33,10 @@ async def handle_closing_input(update: Update, context: ContextTypes.DEFAULT_TYP
                 parse_mode="Markdown"
             )
 
-        # Update history
+        # Record today's balance (replaces an earlier close from the same day)
         tz = pytz.timezone("Asia/Kolkata")
         current_date = datetime.now(tz).strftime("%Y-%m-%d")
-        
-        history = user_data.get("history", [])
-        if history and history[-1]["date"] == current_date:
-            history[-1]["balance"] = balance
-        else:
-            history.append({"date": current_date, "balance": balance})
+        session.append_history(current_date, balance)
 
         # Check target
         if user_data.get("target"):
@@ -51,10 +47,7 @@ async def handle_closing_input(update: Update, context: ContextTypes.DEFAULT_TYP
                     parse_mode="Markdown"
                 )
 
-        update_user_data(user_id, {
-            "history": history,
-            "awaiting": None
-        })
+        session.update({"awaiting": None})
 
         await update.message.reply_text(
             "✅ बैलेंस सफलतापूर्वक रिकॉर्ड किया गया!\nअपनी प्रगति देखने के लिए /status का उपयोग करें।" if language == "hi" else
@@ -71,13 +64,14 @@ async def handle_closing_input(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return CLOSING
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel balance closing process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
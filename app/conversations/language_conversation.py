@@ -1,14 +1,15 @@
 # app/conversations/language_conversation.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import LANGUAGE
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_language_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process language choice."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     text = update.message.text.strip().lower()
 
@@ -21,7 +22,7 @@ async def handle_language_input(update: Update, context: ContextTypes.DEFAULT_TY
 
     new_language = "hi" if text in ["hi", "hindi"] else "en"
 
-    update_user_data(user_id, {
+    session.update({
         "language": new_language,
         "awaiting": None
     })
@@ -33,13 +34,14 @@ async def handle_language_input(update: Update, context: ContextTypes.DEFAULT_TY
 
     return ConversationHandler.END
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel language selection process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
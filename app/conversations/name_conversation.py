@@ -1,14 +1,15 @@
 # app/conversations/name_conversation.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import NAME
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_name_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process name input."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     name = update.message.text.strip()
 
@@ -20,7 +21,7 @@ async def handle_name_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return NAME
 
-    update_user_data(user_id, {
+    session.update({
         "name": name,
         "awaiting": None
     })
@@ -33,13 +34,14 @@ async def handle_name_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     return ConversationHandler.END
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel name setting process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
@@ -1,14 +1,15 @@
 # app/conversations/rate_mode_conversation.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import RATE_MODE
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_rate_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process rate and mode input."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     text = update.message.text.strip()
 
@@ -44,7 +45,7 @@ async def handle_rate_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         target["rate"] = rate
         target["mode"] = mode
 
-        update_user_data(user_id, {
+        session.update({
             "target": target,
             "awaiting": None
         })
@@ -64,13 +65,14 @@ async def handle_rate_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return RATE_MODE
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel rate and mode setting process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
@@ -1,14 +1,15 @@
 # app/conversations/stoploss_conversation.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import STOPLOSS
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_stoploss_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process stop-loss percentage input."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     text = update.message.text.strip()
 
@@ -22,7 +23,7 @@ async def handle_stoploss_input(update: Update, context: ContextTypes.DEFAULT_TY
             )
             return STOPLOSS
 
-        update_user_data(user_id, {
+        session.update({
             "stoploss": stoploss,
             "awaiting": None
         })
@@ -42,13 +43,14 @@ async def handle_stoploss_input(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return STOPLOSS
 
+@with_user_session
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel stop-loss setting process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
@@ -3,14 +3,15 @@ from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from datetime import datetime
 import pytz
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import TARGET
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def handle_target_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process target input from user."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
     text = update.message.text.strip()
 
@@ -48,7 +49,7 @@ async def handle_target_input(update: Update, context: ContextTypes.DEFAULT_TYPE
         tz = pytz.timezone("Asia/Kolkata")
         start_date = datetime.now(tz).strftime("%Y-%m-%d")
 
-        update_user_data(user_id, {
+        session.update({
             "target": {
                 "start_amount": start_amount,
                 "target_amount": target_amount,
@@ -77,13 +78,14 @@ async def handle_target_input(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return TARGET
 
+@with_user_session
 async def cancel_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel target setting process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    update_user_data(user_id, {"awaiting": None})
+    session.update({"awaiting": None})
 
     await update.message.reply_text(
         MESSAGES[language]["cancel"],
@@ -1,14 +1,16 @@
 # app/handlers/broadcast_handler.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import get_user_data, update_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import BROADCAST, OWNER_ID
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Initiate broadcast process for owner."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_id = session.user_id
+    user_data = session.data
     language = user_data.get("language", "en")
 
     if user_id != OWNER_ID:
@@ -24,5 +26,5 @@ async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         parse_mode="Markdown"
     )
 
-    update_user_data(user_id, {"awaiting": "broadcast"})
+    session.update({"awaiting": "broadcast"})
     return BROADCAST
\ No newline at end of file
@@ -1,14 +1,15 @@
 # app/handlers/close_handler.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import get_user_data, update_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import CLOSING
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def close_balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Initiate balance closing process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     if not user_data.get("target"):
@@ -23,5 +24,5 @@ async def close_balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         parse_mode="Markdown"
     )
 
-    update_user_data(user_id, {"awaiting": "closing"})
+    session.update({"awaiting": "closing"})
     return CLOSING
\ No newline at end of file
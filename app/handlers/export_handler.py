@@ -1,17 +1,21 @@
 # app/handlers/export_handler.py
 from telegram import Update, InputFile
 from telegram.ext import ContextTypes
-from app.utils.data_utils import get_user_data
+from app.utils.data_utils import get_full_history, run_in_storage_executor
+from app.utils.session_utils import with_user_session
 from app.utils.export_utils import generate_excel_report
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def export(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /export command, sending Excel report."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
-    report_buffer = generate_excel_report(user_id)
+    report_buffer = await run_in_storage_executor(
+        lambda: generate_excel_report(user_data, get_full_history(session.user_id, user_data))
+    )
     if not report_buffer:
         await update.message.reply_text(
             MESSAGES[language]["no_history"],
@@ -1,13 +1,14 @@
 # app/handlers/help_handler.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.utils.data_utils import get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /help command with comprehensive command guide."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     await update.message.reply_text(
@@ -1,14 +1,15 @@
 # app/handlers/language_handler.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import get_user_data, update_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import LANGUAGE
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Initiate language selection process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     await update.message.reply_text(
@@ -16,5 +17,5 @@ async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         parse_mode="Markdown"
     )
 
-    update_user_data(user_id, {"awaiting": "language"})
+    session.update({"awaiting": "language"})
     return LANGUAGE
\ No newline at end of file
@@ -0,0 +1,61 @@
+# app/handlers/projection_handler.py
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from app.utils.session_utils import with_user_session
+from app.utils.projection_utils import MIN_REGRESSION_POINTS, calculate_projection
+from app.config.messages import MESSAGES
+from app.config.constants import CURRENCY
+
+logger = logging.getLogger(__name__)
+
+def _eta_line(finish_date, days_left, language: str) -> str:
+    if days_left is None:
+        return MESSAGES[language]["projection_never"]
+    if days_left == 0:
+        return MESSAGES[language]["projection_reached"]
+    return MESSAGES[language]["projection_eta"].format(date=finish_date, days=round(days_left))
+
+@with_user_session
+async def projection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /projection command: when the target is reached at the planned and realized rates."""
+    session = context.user_session
+    user_data = session.data
+    language = user_data.get("language", "en")
+
+    if not user_data.get("target"):
+        await update.message.reply_text(
+            MESSAGES[language]["no_target"],
+            parse_mode="Markdown"
+        )
+        return
+
+    result = calculate_projection(user_data)
+    if result["error"]:
+        logger.error(f"Projection failed for user {session.user_id}: {result['error']}")
+        await update.message.reply_text(
+            MESSAGES[language]["status_data_error"].format(error_details=result["error"]),
+            parse_mode="Markdown"
+        )
+        return
+
+    if result["realized_rate"] is None:
+        realized = MESSAGES[language]["projection_need_history"].format(points=MIN_REGRESSION_POINTS)
+    else:
+        realized = MESSAGES[language]["projection_realized_rate"].format(
+            rate=f"{result['realized_rate']:,.2f}",
+            fit=f"{result['fit_quality'] * 100:.0f}"
+        ) + "\n" + _eta_line(result["realized_finish_date"], result["realized_days_left"], language)
+
+    currency = user_data.get("currency", CURRENCY)
+    await update.message.reply_text(
+        MESSAGES[language]["projection_summary"].format(
+            current_balance=f"{currency}{result['current_balance']:,.2f}",
+            target_amount=f"{currency}{result['target_amount']:,.2f}",
+            planned_rate=result["planned_rate"],
+            mode=user_data["target"].get("mode", "daily"),
+            planned=_eta_line(result["planned_finish_date"], result["planned_days_left"], language),
+            realized=realized
+        ),
+        parse_mode="Markdown"
+    )
@@ -1,13 +1,14 @@
 # app/handlers/reset_handler.py
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from app.utils.data_utils import get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Initiate data reset process with confirmation."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     keyboard = [
@@ -1,14 +1,15 @@
 # app/handlers/settings_handler.py
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from app.utils.data_utils import get_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import CURRENCY
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display settings menu with inline buttons."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     settings_summary = f"⚙️ *{'सेटिंग्स' if language == 'hi' else 'Settings'}*\n\n"
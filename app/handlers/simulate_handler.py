@@ -0,0 +1,58 @@
+# app/handlers/simulate_handler.py
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from app.utils.session_utils import with_user_session
+from app.utils.simulation_utils import MIN_RETURNS, async_run_simulation
+from app.config.messages import MESSAGES
+from app.config.constants import CURRENCY
+
+logger = logging.getLogger(__name__)
+
+@with_user_session
+async def simulate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /simulate command: Monte Carlo odds of reaching the target from the user's own volatility."""
+    session = context.user_session
+    user_data = session.data
+    language = user_data.get("language", "en")
+
+    if not user_data.get("target"):
+        await update.message.reply_text(
+            MESSAGES[language]["no_target"],
+            parse_mode="Markdown"
+        )
+        return
+
+    # CPU-bound for up to SIMULATION_TIME_BUDGET; runs on its own pool, off the event loop
+    result = await async_run_simulation(user_data)
+    if result["error"]:
+        logger.error(f"Simulation failed for user {session.user_id}: {result['error']}")
+        await update.message.reply_text(
+            MESSAGES[language]["status_data_error"].format(error_details=result["error"]),
+            parse_mode="Markdown"
+        )
+        return
+
+    if result["current_balance"] >= result["target_amount"]:
+        message = MESSAGES[language]["simulate_reached"]
+    elif result["current_balance"] <= 0:
+        message = MESSAGES[language]["simulate_zero_balance"]
+    elif result["returns"] is None:
+        message = MESSAGES[language]["simulate_need_history"].format(points=MIN_RETURNS + 1)
+    else:
+        currency = user_data.get("currency", CURRENCY)
+        percentiles = result["percentiles"]
+        message = MESSAGES[language]["simulate_summary"].format(
+            paths=f"{result['paths']:,}",
+            date=result["horizon_date"],
+            probability=f"{result['hit_probability'] * 100:.1f}",
+            target_amount=f"{currency}{result['target_amount']:,.2f}",
+            p5=f"{currency}{percentiles[5]:,.2f}",
+            p25=f"{currency}{percentiles[25]:,.2f}",
+            p50=f"{currency}{percentiles[50]:,.2f}",
+            p75=f"{currency}{percentiles[75]:,.2f}",
+            p95=f"{currency}{percentiles[95]:,.2f}",
+            volatility=f"{result['returns']['volatility'] * 100:.2f}"
+        )
+
+    await update.message.reply_text(message, parse_mode="Markdown")
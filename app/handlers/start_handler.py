@@ -1,21 +1,22 @@
 # app/handlers/start_handler.py
 from telegram import Update, InputFile
 from telegram.ext import ContextTypes
-from app.utils.data_utils import update_user_data, get_user_data
+from app.utils.session_utils import with_user_session
 from app.utils.image_utils import generate_daily_profile_card
-from app.utils.calculation_utils import calculate_progress
 from app.config.messages import MESSAGES
 import telegram.error
 
+@with_user_session
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command, initializing user and sending profile card."""
     user = update.effective_user
-    user_id = str(user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_id = session.user_id
+    user_data = session.data
     language = user_data.get("language", "en")
 
     if not user_data.get("name"):
-        update_user_data(user_id, {
+        session.update({
             "name": user.first_name,
             "language": "en",
             "currency": "₹",
@@ -38,8 +39,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         print(f"Error fetching profile photo for user {user_id}: {str(e)}")
 
     # Calculate progress data before generating the profile card
-    user_data = get_user_data(user_id)
-    progress_data = calculate_progress(user_data)
+    progress_data = session.progress()
     
     daily_profile_card = generate_daily_profile_card(user_data, progress_data, profile_photo)
 
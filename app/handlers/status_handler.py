@@ -1,9 +1,8 @@
 # app/handlers/status_handler.py
 from telegram import Update, InputFile
 from telegram.ext import ContextTypes
-from app.utils.data_utils import get_user_data
+from app.utils.session_utils import with_user_session
 from app.utils.image_utils import generate_daily_profile_card
-from app.utils.calculation_utils import calculate_progress
 from app.config.constants import CURRENCY
 from app.config.messages import MESSAGES
 import telegram.error
@@ -12,12 +11,14 @@ import traceback
 
 logger = logging.getLogger(__name__)
 
+@with_user_session
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /status command, showing progress summary and profile card."""
     try:
         user = update.effective_user
-        user_id = str(user.id)
-        user_data = get_user_data(user_id)
+        session = context.user_session
+        user_id = session.user_id
+        user_data = session.data
         language = user_data.get("language", "en")
 
         logger.info(f"Processing status command for user {user_id}")
@@ -31,7 +32,7 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             return
 
         # Calculate progress data
-        progress_data = calculate_progress(user_data)
+        progress_data = session.progress()
         logger.info(f"Progress data calculated for user {user_id}: {progress_data}")
 
         # Handle Data Validation Errors
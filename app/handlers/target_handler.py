@@ -1,14 +1,15 @@
 # app/handlers/target_handler.py
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from app.utils.data_utils import get_user_data, update_user_data
+from app.utils.session_utils import with_user_session
 from app.config.constants import TARGET
 from app.config.messages import MESSAGES
 
+@with_user_session
 async def set_target(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Initiate target setting process."""
-    user_id = str(update.effective_user.id)
-    user_data = get_user_data(user_id)
+    session = context.user_session
+    user_data = session.data
     language = user_data.get("language", "en")
 
     if user_data.get("target"):
@@ -23,5 +24,5 @@ async def set_target(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         parse_mode="Markdown"
     )
 
-    update_user_data(user_id, {"awaiting": "target"})
+    session.update({"awaiting": "target"})
     return TARGET
\ No newline at end of file
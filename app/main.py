@@ -25,6 +25,8 @@ from app.handlers.settings_handler import settings
 from app.handlers.reset_handler import reset
 from app.handlers.broadcast_handler import broadcast
 from app.handlers.export_handler import export
+from app.handlers.projection_handler import projection
+from app.handlers.simulate_handler import simulate
 from app.handlers.language_handler import set_language
 from app.handlers.help_handler import help_command
 from app.handlers.callback_handler import handle_settings_callback
@@ -37,8 +39,12 @@ from app.conversations.currency_conversation import handle_currency_input, cance
 from app.conversations.broadcast_conversation import handle_broadcast_input, cancel as broadcast_cancel
 from app.conversations.language_conversation import handle_language_input, cancel as language_cancel
 from app.utils.reminder_utils import schedule_reminders
-from app.utils.data_utils import get_user_data
-from app.config.constants import TARGET, CLOSING, STOPLOSS, NAME, RATE_MODE, CURRENCY_CHANGE, BROADCAST, LANGUAGE
+from app.utils.data_utils import init_storage, shutdown_storage
+from app.utils.calculation_utils import log_cache_stats
+from app.utils.session_utils import with_user_session
+from app.config.constants import (
+    TARGET, CLOSING, STOPLOSS, NAME, RATE_MODE, CURRENCY_CHANGE, BROADCAST, LANGUAGE, CACHE_STATS_INTERVAL
+)
 from app.config.messages import MESSAGES
 
 # Enable logging
@@ -48,11 +54,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@with_user_session
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle unknown commands."""
     try:
-        user_id = str(update.effective_user.id)
-        user_data = get_user_data(user_id)
+        session = context.user_session
+        user_data = session.data
         language = user_data.get("language", "en")
         await update.message.reply_text(
             MESSAGES[language]["unknown_command"],
@@ -61,6 +68,11 @@ async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     except Exception as e:
         logger.error(f"Error in unknown_command handler: {e}")
 
+async def post_shutdown(application: Application) -> None:
+    """Write any cached user changes before the process exits."""
+    shutdown_storage()
+    log_cache_stats()
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Log the error and send a telegram message to notify the developer."""
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
@@ -85,8 +97,11 @@ def main() -> None:
 
         logger.info("Starting Compounding Tracker Bot...")
 
+        # Load user data into memory once; changes are flushed in the background
+        init_storage()
+
         # Create application
-        application = Application.builder().token(bot_token).build()
+        application = Application.builder().token(bot_token).post_shutdown(post_shutdown).build()
 
         # Add error handler
         application.add_error_handler(error_handler)
@@ -97,6 +112,8 @@ def main() -> None:
         application.add_handler(CommandHandler("settings", settings))
         application.add_handler(CommandHandler("reset", reset))
         application.add_handler(CommandHandler("export", export))
+        application.add_handler(CommandHandler("projection", projection))
+        application.add_handler(CommandHandler("simulate", simulate))
         application.add_handler(CommandHandler("help", help_command))
 
         # Conversation Handlers
@@ -164,6 +181,7 @@ def main() -> None:
         try:
             scheduler = AsyncIOScheduler()
             schedule_reminders(scheduler, application)
+            scheduler.add_job(log_cache_stats, trigger="interval", seconds=CACHE_STATS_INTERVAL)
             scheduler.start()
             logger.info("Scheduler started successfully")
         except Exception as e:
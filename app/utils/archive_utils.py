@@ -0,0 +1,166 @@
+# app/utils/archive_utils.py
+import gzip
+import json
+import os
+import time
+from array import array
+from bisect import bisect_left
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+import logging
+from app.utils.history_utils import EPOCH_ORDINAL, HistoryColumns, day_to_date
+from app.utils.lock_utils import ProcessLock
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PERIODS = ("week", "month")
+
+def period_key(day: int, period: str) -> str:
+    """Return the rollup bucket of an epoch day: "2025-W07" for weeks, "2025-02" for months."""
+    value = date.fromordinal(day + EPOCH_ORDINAL)
+    if period == "week":
+        year, week, _ = value.isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{value.year}-{value.month:02d}"
+
+def rollup_history(history: HistoryColumns, period: str) -> List[dict]:
+    """Summarise a history into open/close/min/max per week or month, oldest first."""
+    rollup = []
+    current = None
+    for day, balance in zip(history.days, history.balances):
+        key = period_key(day, period)
+        if current is None or current["period"] != key:
+            current = {
+                "period": key, "start": day_to_date(day), "end": day_to_date(day),
+                "open": balance, "close": balance, "min": balance, "max": balance, "days": 0
+            }
+            rollup.append(current)
+        current["end"] = day_to_date(day)
+        current["close"] = balance
+        current["min"] = min(current["min"], balance)
+        current["max"] = max(current["max"], balance)
+        current["days"] += 1
+    return rollup
+
+def split_history(history: HistoryColumns, cutoff_day: int) -> Tuple[HistoryColumns, HistoryColumns]:
+    """Split a history into the days before ``cutoff_day`` and the rest."""
+    days, balances = history.days, history.balances
+    index = bisect_left(days, cutoff_day)
+    return (
+        HistoryColumns(array("i", days[:index]), array("d", balances[:index])),
+        HistoryColumns(array("i", days[index:]), array("d", balances[index:]))
+    )
+
+def combine_history(older: HistoryColumns, newer: HistoryColumns) -> HistoryColumns:
+    """Merge two histories; where both have a date, ``newer`` wins."""
+    if not older:
+        return newer
+    if not newer:
+        return older
+    merged = dict(zip(older.days, older.balances))
+    merged.update(zip(newer.days, newer.balances))
+    days = sorted(merged)
+    return HistoryColumns(array("i", days), array("d", [merged[day] for day in days]))
+
+def _user_file(directory: str, user_id: str, suffix: str) -> str:
+    # Bucket by the last two digits so no directory grows to hold every user
+    return os.path.join(directory, user_id[-2:].rjust(2, "_"), f"{user_id}{suffix}")
+
+def _read_gzip_json(path: str):
+    """Return the decoded contents of a gzip JSON file, or None if it doesn't exist."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_gzip_json(path: str, value) -> None:
+    """Atomically replace a gzip JSON file, synced to disk before returning."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_file, path)
+
+
+class HistoryArchive:
+    """Cold tier for old daily closes: one gzip-compressed file per user.
+
+    Files live under ``<directory>/<last two digits of the id>/<id>.json.gz`` and
+    hold the encoded HistoryColumns. They are only read for full-range views such
+    as exports; the hot record keeps recent days plus a rollup of the rest.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = ProcessLock(os.path.join(directory, "archive.lock"))
+
+    def path(self, user_id: str) -> str:
+        return _user_file(self.directory, user_id, ".json.gz")
+
+    def read(self, user_id: str, through: Optional[int] = None) -> HistoryColumns:
+        """Return a user's archived days, ignoring any after ``through``."""
+        history = HistoryColumns.decode(_read_gzip_json(self.path(user_id)))
+        if through is not None:
+            history, _ = split_history(history, through + 1)
+        return history
+
+    def write(self, user_id: str, history: HistoryColumns) -> None:
+        """Replace a user's archived days, durably, before the hot copy is trimmed."""
+        with self.lock.hold():
+            _write_gzip_json(self.path(user_id), history.encode())
+
+
+class UserArchive:
+    """Cold store for whole user records moved out of the hot store.
+
+    One gzip file per user under ``<directory>/<last two digits>/<id>.user.json.gz``
+    holding {"record": <stored record>, "archived_at": <unix time>, "reason": ...}.
+    Nothing reads it during normal operation; a record is brought back (and its
+    file removed) the next time its user talks to the bot.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = ProcessLock(os.path.join(directory, "archive.lock"))
+
+    def path(self, user_id: str) -> str:
+        return _user_file(self.directory, user_id, ".user.json.gz")
+
+    def iter_reasons(self) -> Iterator[Tuple[str, str]]:
+        """Yield (user_id, reason) for every archived user, reading one file at a time."""
+        if not os.path.isdir(self.directory):
+            return
+        for bucket in sorted(os.listdir(self.directory)):
+            bucket_dir = os.path.join(self.directory, bucket)
+            if not os.path.isdir(bucket_dir):
+                continue
+            for name in sorted(os.listdir(bucket_dir)):
+                if not name.endswith(".user.json.gz"):
+                    continue
+                entry = _read_gzip_json(os.path.join(bucket_dir, name))
+                # None if the user was restored since the listing
+                if entry is not None:
+                    yield name[:-len(".user.json.gz")], entry.get("reason")
+
+    def contains(self, user_id: str) -> bool:
+        return os.path.exists(self.path(user_id))
+
+    def read(self, user_id: str) -> Optional[dict]:
+        """Return a user's archived record, or None if they are not archived."""
+        entry = _read_gzip_json(self.path(user_id))
+        return entry["record"] if entry is not None else None
+
+    def write(self, user_id: str, record: dict, reason: str) -> None:
+        with self.lock.hold():
+            _write_gzip_json(self.path(user_id), {"record": record, "archived_at": time.time(), "reason": reason})
+
+    def remove(self, user_id: str) -> None:
+        with self.lock.hold():
+            try:
+                os.remove(self.path(user_id))
+            except FileNotFoundError:
+                pass
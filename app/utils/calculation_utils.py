@@ -1,28 +1,124 @@
 # app/utils/calculation_utils.py
 import logging
+from collections import OrderedDict
 from datetime import datetime
+from threading import Lock
+from typing import Iterable, Mapping, Optional, Tuple
+import numpy as np
 import pytz
 import math
 import traceback
+from app.config.constants import GROWTH_CACHE_SIZE, GROWTH_TABLE_MAX_DAYS, PROGRESS_CACHE_SIZE, TIMEZONE
+from app.utils.history_utils import date_to_day, get_history
 
 logger = logging.getLogger(__name__)
 
+IST = pytz.timezone(TIMEZONE)
+# calculate_progress attaches IST to naive start dates with replace(), which gives
+# pytz's LMT offset (+05:53); the batch path uses the same offset so both agree
+_START_OFFSET = datetime(2000, 1, 1).replace(tzinfo=IST).utcoffset().total_seconds()
+
+def _periodic_rate(rate: float, mode: str) -> Tuple[float, int]:
+    """Return (rate per compounding period, days per period) for a mode."""
+    if mode == "daily":
+        return rate / 100 / 365, 1  # Daily rate
+    return rate / 100 / 12, 30      # Monthly rate
+
+
+class GrowthFactorCache:
+    """Bounded LRU of growth factor tables, one per (rate, mode).
+
+    A table holds ``(1 + r) ** n`` for day 0, 1, 2, ... and is extended (at
+    least doubling) when a longer range is asked for, so the expected balances
+    over any range of days are a slice times the start amount. Most users share
+    a handful of rates, so the tables are reused across users.
+    """
+
+    def __init__(self, max_entries: int = GROWTH_CACHE_SIZE, max_days: int = GROWTH_TABLE_MAX_DAYS):
+        self.max_entries = max_entries
+        self.max_days = max_days
+        self.tables = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+
+    def factors(self, rate: float, mode: str, days: int) -> Optional[np.ndarray]:
+        """Return read-only growth factors for days 0..days, or None if days is out of range."""
+        if days < 0 or days > self.max_days:
+            return None
+        key = (float(rate), "daily" if mode == "daily" else "monthly")
+        with self.lock:
+            table = self.tables.get(key)
+            if table is None:
+                self.misses += 1
+            elif len(table) > days:
+                self.hits += 1
+                self.tables.move_to_end(key)
+                return table[:days + 1]
+            else:
+                self.extensions += 1
+            size = min(self.max_days + 1, max(days + 1, 2 * len(table) if table is not None else 366))
+            periodic_rate, days_per_period = _periodic_rate(*key)
+            # Each factor is its own power, so long tables don't accumulate rounding from a running product
+            table = np.power(1 + periodic_rate, np.arange(size) / days_per_period)
+            table.flags.writeable = False
+            self.tables[key] = table
+            self.tables.move_to_end(key)
+            while len(self.tables) > self.max_entries:
+                self.tables.popitem(last=False)
+            return table[:days + 1]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the hit rate."""
+        with self.lock:
+            lookups = self.hits + self.misses + self.extensions
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "extensions": self.extensions,
+                "tables": len(self.tables),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.tables.clear()
+            self.hits = self.misses = self.extensions = 0
+
+growth_cache = GrowthFactorCache()
+
+def expected_balance_series(start_amount: float, rate: float, mode: str, days) -> np.ndarray:
+    """Expected balances for an array of day offsets from the start date."""
+    days = np.asarray(days)
+    if days.size == 0:
+        return np.zeros(0)
+    if np.issubdtype(days.dtype, np.integer) and days.min() >= 0:
+        table = growth_cache.factors(rate, mode, int(days.max()))
+        if table is not None:
+            return start_amount * table[days]
+    periodic_rate, days_per_period = _periodic_rate(rate, mode)
+    return start_amount * np.power(1 + periodic_rate, days / days_per_period)
+
 def calculate_compounding(start_amount: float, rate: float, mode: str, periods: float) -> float:
     """Calculate compounded balance based on start amount, rate, mode, and periods."""
     try:
-        if mode == "daily":
-            r = rate / 100 / 365  # Daily rate
-            n = periods
-        else:  # monthly
-            r = rate / 100 / 12   # Monthly rate
-            n = periods / 30      # Periods in months
-        
-        result = start_amount * math.pow(1 + r, n)
+        # A single math.pow is cheaper than a table lookup; tables pay off for ranges of days
+        r, days_per_period = _periodic_rate(rate, mode)
+        result = start_amount * math.pow(1 + r, periods / days_per_period)
         return result
     except Exception as e:
         logger.error(f"Error in calculate_compounding: {e}")
         return start_amount
 
+def progress_day(now: datetime = None) -> int:
+    """Return the day number calculate_progress counts from, which changes at IST midnight.
+
+    Uses the same offset calculate_progress applies to start dates, so two times
+    with equal progress days always give the same days_passed.
+    """
+    return int(((now or datetime.now(IST)).timestamp() + _START_OFFSET) // 86400)
+
 def check_stoploss(user_data: dict, balance: float) -> bool:
     """Check if balance is below stop-loss level."""
     try:
@@ -38,7 +134,7 @@ def check_stoploss(user_data: dict, balance: float) -> bool:
 
 def calculate_progress(user_data: dict) -> dict:
     """Calculate user progress metrics."""
-    logger.info("Starting progress calculation")
+    logger.debug("Starting progress calculation")
     
     default_error_return = {
         "days_passed": 0,
@@ -78,10 +174,10 @@ def calculate_progress(user_data: dict) -> dict:
 
         mode = target.get("mode", "daily")
         start_date = user_data.get("start_date")
-        history = user_data.get("history", [])
+        history = get_history(user_data)
 
         # Calculate days passed
-        tz = pytz.timezone("Asia/Kolkata")
+        tz = IST
         current_date = datetime.now(tz)
 
         if start_date:
@@ -110,12 +206,8 @@ def calculate_progress(user_data: dict) -> dict:
 
         # Get current balance from history
         current_balance = start_amount
-        if history:
-            try:
-                current_balance = float(history[-1]["balance"])
-            except (ValueError, KeyError, IndexError):
-                logger.warning("Invalid balance in history, using start amount")
-                current_balance = start_amount
+        if history.last_balance is not None:
+            current_balance = history.last_balance
 
         # Calculate stop-loss level
         stoploss_level = None
@@ -147,7 +239,7 @@ def calculate_progress(user_data: dict) -> dict:
             "error": None
         }
         
-        logger.info(f"Progress calculation completed successfully: {result}")
+        logger.debug(f"Progress calculation completed successfully: {result}")
         return result
 
     except Exception as e:
@@ -156,4 +248,201 @@ def calculate_progress(user_data: dict) -> dict:
         return {
             **default_error_return,
             "error": f"Calculation error: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+class ProgressCache:
+    """Bounded LRU of calculate_progress results per user.
+
+    An entry is reused only while the caller's record version and the progress
+    day are unchanged, so an update to the record (which gives it a new
+    version) or the day rolling over at midnight forces a recalculation.
+    """
+
+    def __init__(self, max_entries: int = PROGRESS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.day = None
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, version, user_data: dict) -> dict:
+        """Return progress for a record read at ``version``; None as version skips the cache."""
+        if version is None:
+            return calculate_progress(user_data)
+        day = progress_day()
+        with self.lock:
+            if day != self.day:
+                # Every entry is from an earlier day
+                self.entries.clear()
+                self.day = day
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                self.entries.move_to_end(user_id)
+                return dict(entry[1])
+            self.misses += 1
+        result = calculate_progress(user_data)
+        with self.lock:
+            if self.day == day:
+                self.entries[user_id] = (version, result)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return dict(result)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+progress_cache = ProgressCache()
+
+def log_cache_stats() -> None:
+    """Log the hit rates of the growth table and progress caches."""
+    growth = growth_cache.stats()
+    progress = progress_cache.stats()
+    logger.info(
+        f"Growth tables: {growth['hit_rate']:.1%} hit rate ({growth['hits']} hits, {growth['misses']} misses, "
+        f"{growth['extensions']} extensions, {growth['tables']} tables); "
+        f"progress cache: {progress['hit_rate']:.1%} hit rate ({progress['hits']} hits, {progress['misses']} misses, "
+        f"{progress['entries']} entries)"
+    )
+
+class ProgressBatch:
+    """Progress metrics for many users as parallel NumPy arrays.
+
+    Position ``i`` of every array belongs to ``user_ids[i]``; ``stoploss_level``
+    is NaN where no stop-loss is set. ``progress(user_id)`` returns the same
+    dict calculate_progress would for that user.
+    """
+
+    STATUS_BADGES = np.array(["🟢", "🟡", "🔴"])
+
+    def __init__(self, user_ids: list, columns: dict, skipped: dict):
+        self.user_ids = user_ids
+        self.index = {user_id: position for position, user_id in enumerate(user_ids)}
+        self.days_passed = columns["days_passed"]
+        self.expected_balance = columns["expected_balance"]
+        self.today_profit_goal = columns["today_profit_goal"]
+        self.stoploss_level = columns["stoploss_level"]
+        self.current_balance = columns["current_balance"]
+        self.status = columns["status"]
+        self.start_amount = columns["start_amount"]
+        self.target_amount = columns["target_amount"]
+        self.rate = columns["rate"]
+        # user_id -> reason for users without a usable target
+        self.skipped = skipped
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def status_badge(self) -> np.ndarray:
+        return self.STATUS_BADGES[self.status]
+
+    def progress(self, user_id: str) -> Optional[dict]:
+        """Return one user's metrics in calculate_progress form, or None if they were skipped."""
+        position = self.index.get(user_id)
+        if position is None:
+            return None
+        stoploss_level = float(self.stoploss_level[position])
+        return {
+            "days_passed": int(self.days_passed[position]),
+            "expected_balance": float(self.expected_balance[position]),
+            "today_profit_goal": float(self.today_profit_goal[position]),
+            "stoploss_level": None if math.isnan(stoploss_level) else stoploss_level,
+            "current_balance": float(self.current_balance[position]),
+            "status_badge": str(self.STATUS_BADGES[self.status[position]]),
+            "start_amount_val": float(self.start_amount[position]),
+            "target_amount_val": float(self.target_amount[position]),
+            "rate_val": float(self.rate[position]),
+            "error": None
+        }
+
+def _pack_target(record: dict) -> Tuple[float, float, float, bool, float, float, float]:
+    """Pull the inputs of one user's progress out of their record (raises on bad data)."""
+    target = record["target"]
+    start_amount = float(target["start_amount"])
+    rate = float(target["rate"])
+    target_amount = float(target["target_amount"])
+    try:
+        start_day = date_to_day(record["start_date"]) if record.get("start_date") else np.nan
+    except ValueError:
+        start_day = np.nan
+    try:
+        stoploss_level = start_amount * (1 - float(record["stoploss"]) / 100) if record.get("stoploss") else np.nan
+    except ValueError:
+        stoploss_level = np.nan
+    last_balance = get_history(record).last_balance
+    current_balance = start_amount if last_balance is None else last_balance
+    return (
+        start_amount, rate, target_amount, target.get("mode", "daily") == "daily",
+        start_day, stoploss_level, current_balance
+    )
+
+def compound_growth(start_amount: np.ndarray, rate: np.ndarray, daily: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_compounding over arrays of users."""
+    periods_per_year = np.where(daily, 365.0, 12.0)
+    periods = np.where(daily, days, days / 30)
+    return start_amount * np.power(1 + rate / 100 / periods_per_year, periods)
+
+def calculate_progress_batch(records: Iterable[Tuple[str, dict]], now: datetime = None) -> ProgressBatch:
+    """Calculate progress for many users in one vectorized pass.
+
+    ``records`` yields (user_id, record) pairs, e.g. ``snapshot().items()``.
+    Users without a valid target are left out and listed in ``skipped``.
+    """
+    if isinstance(records, Mapping):
+        records = records.items()
+    user_ids = []
+    rows = []
+    skipped = {}
+    for user_id, record in records:
+        if not record.get("target"):
+            skipped[user_id] = "No target set"
+            continue
+        try:
+            rows.append(_pack_target(record))
+        except (ValueError, KeyError, TypeError) as e:
+            skipped[user_id] = f"Invalid target data: {e}"
+            continue
+        user_ids.append(user_id)
+
+    packed = np.array(rows, dtype=np.float64).reshape(len(rows), 7)
+    start_amount, rate, target_amount, daily, start_day, stoploss_level, current_balance = packed.T
+    daily = daily.astype(bool)
+
+    now_ts = (now or datetime.now(IST)).timestamp()
+    # Whole days since local midnight of the start date; future or missing start dates count as 0
+    elapsed = now_ts - (start_day * 86400 - _START_OFFSET)
+    days_passed = np.where(np.isnan(start_day), 0, np.floor_divide(np.maximum(elapsed, 0), 86400)).astype(np.int64)
+
+    expected_balance = compound_growth(start_amount, rate, daily, days_passed)
+    # On day 0 the goal is the first day's growth; afterwards it is the growth since yesterday
+    goal_day = np.maximum(days_passed, 1)
+    today_profit_goal = (
+        compound_growth(start_amount, rate, daily, goal_day) - compound_growth(start_amount, rate, daily, goal_day - 1)
+    )
+
+    status = np.where(
+        current_balance >= expected_balance, 0,
+        np.where((stoploss_level != 0) & (current_balance < stoploss_level), 2, 1)
+    )
+    return ProgressBatch(user_ids, {
+        "days_passed": days_passed,
+        "expected_balance": expected_balance,
+        "today_profit_goal": today_profit_goal,
+        "stoploss_level": stoploss_level,
+        "current_balance": current_balance,
+        "status": status,
+        "start_amount": start_amount,
+        "target_amount": target_amount,
+        "rate": rate,
+    }, skipped)
@@ -0,0 +1,237 @@
+# app/utils/codec_utils.py
+import io
+import json
+import logging
+from typing import IO, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional compact binary format
+    msgpack = None
+
+try:
+    import ijson
+except ImportError:  # Optional C-accelerated streaming parser
+    ijson = None
+
+# Binary codecs prefix their files with "CTRK/<codec name>\n" so the reader can pick the
+# right decoder. JSON codecs write plain JSON, which older versions can still read.
+HEADER_PREFIX = b"CTRK/"
+
+
+class Codec:
+    """Serializes the store to bytes and back."""
+
+    name = "base"
+    header = True
+
+    def encode(self, data) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, payload: bytes):
+        raise NotImplementedError
+
+
+class JsonPrettyCodec(Codec):
+    """Indented JSON without a header: the original, human-readable layout."""
+
+    name = "json-pretty"
+    header = False
+
+    def encode(self, data) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def decode(self, payload: bytes):
+        return json.loads(payload)
+
+
+class JsonCodec(Codec):
+    """Compact JSON with no whitespace."""
+
+    name = "json"
+    header = False
+
+    def encode(self, data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, payload: bytes):
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+
+class OrjsonCodec(Codec):
+    """Compact JSON encoded and decoded with orjson."""
+
+    name = "orjson"
+    header = False
+
+    def encode(self, data) -> bytes:
+        return orjson.dumps(data)
+
+    def decode(self, payload: bytes):
+        return orjson.loads(payload)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack binary encoding."""
+
+    name = "msgpack"
+
+    def encode(self, data) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload: bytes):
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    JsonPrettyCodec.name: JsonPrettyCodec(),
+    JsonCodec.name: JsonCodec(),
+}
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec()
+if msgpack is not None:
+    CODECS[MsgpackCodec.name] = MsgpackCodec()
+
+def get_codec(name: str) -> Codec:
+    """Return the codec registered under ``name``."""
+    try:
+        return CODECS[name]
+    except KeyError:
+        if name in ("orjson", "msgpack"):
+            raise ValueError(f"Codec '{name}' needs the {name} package (pip install {name})")
+        raise ValueError(f"Unknown codec '{name}'. Choose one of: {', '.join(CODECS)}")
+
+def dumps(data, codec: Codec) -> bytes:
+    """Encode data with the codec, prefixed by its header when it has one."""
+    payload = codec.encode(data)
+    if codec.header:
+        return HEADER_PREFIX + codec.name.encode("ascii") + b"\n" + payload
+    return payload
+
+def detect_codec(raw: bytes) -> Codec:
+    """Return the codec a file was written with, based on its header."""
+    if raw.startswith(HEADER_PREFIX):
+        name = raw[len(HEADER_PREFIX):raw.index(b"\n")].decode("ascii")
+        return get_codec(name)
+    return CODECS[JsonCodec.name]
+
+def is_binary(stream: IO[bytes]) -> bool:
+    """True if a store file was written by a codec with a header (not streamable as JSON)."""
+    position = stream.tell()
+    head = stream.read(len(HEADER_PREFIX))
+    stream.seek(position)
+    return head == HEADER_PREFIX
+
+
+class _JsonStream:
+    """Pull-based reader that decodes one JSON value at a time from a text stream."""
+
+    _whitespace = " \t\r\n"
+
+    def __init__(self, stream: IO[str], chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ("" at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self._whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            data = self.stream.read(self.chunk_size)
+            if not data:
+                return ""
+            self.buffer, self.pos = data, 0
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input until it is whole."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or not isinstance(value, (int, float)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+            data = self.stream.read(size)
+            if not data:
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+            self.buffer = self.buffer[self.pos:] + data
+            self.pos = 0
+            size *= 2
+
+
+def iter_object_items(stream: IO[bytes], key: str = "users", chunk_size: int = 64 * 1024) -> Iterator[Tuple[str, object]]:
+    """Yield the (name, value) pairs of the object stored under a top-level key, one at a time.
+
+    Only one value is decoded at any moment, so memory stays bounded by the
+    largest single value rather than the file. Uses ijson when it is installed.
+    Raises KeyError if the top-level key is missing and ValueError on bad JSON.
+    """
+    if ijson is not None:
+        found = False
+        for name, value in ijson.kvitems(stream, key, use_float=True):
+            found = True
+            yield name, value
+        if not found:
+            stream.seek(0)
+            # Tell "empty object" apart from "no such key"
+            for prefix, event, _ in ijson.parse(stream):
+                if prefix == key and event == "start_map":
+                    return
+            raise KeyError(key)
+        return
+
+    reader = _JsonStream(io.TextIOWrapper(stream, encoding="utf-8"), chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise KeyError(key)
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            reader.expect("{")
+            if reader.peek() == "}":
+                return
+            while True:
+                item_name = reader.value()
+                reader.expect(":")
+                yield item_name, reader.value()
+                if reader.peek() == "}":
+                    return
+                reader.expect(",")
+        reader.value()  # Skip other top-level values
+        if reader.peek() == "}":
+            raise KeyError(key)
+        reader.expect(",")
+
+def loads(raw: bytes):
+    """Decode bytes written by ``dumps`` with any codec."""
+    codec = detect_codec(raw)
+    if codec.header:
+        return codec.decode(raw[raw.index(b"\n") + 1:])
+    return codec.decode(raw)
@@ -1,120 +1,1200 @@
 # app/utils/data_utils.py
-import json
+import asyncio
+import atexit
+import copy
+import functools
+import itertools
+import mmap
 import os
-from threading import Lock
+import pickle
+import time
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from threading import Condition, Event, Lock, RLock, Thread
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import logging
+from app.config.constants import (
+    STORAGE_BACKEND, STORAGE_CODEC, SQLITE_FILE, SHARD_DIR, SEGMENT_DIR, EVENT_LOG_DIR, STORAGE_WORKERS, CACHE_FLUSH_INTERVAL, CACHE_MAX_DIRTY,
+    DURABILITY_MODE, GROUP_COMMIT_WINDOW, HISTORY_LOG_FILE, HISTORY_COMPACT_INTERVAL, HISTORY_COMPACT_EVENTS,
+    WARM_SNAPSHOT_FILE, WARM_SNAPSHOT_INTERVAL, HISTORY_ARCHIVE_DIR, HISTORY_HOT_DAYS, HISTORY_ROLLUP_PERIOD,
+    HISTORY_TIER_INTERVAL, USER_ARCHIVE_DIR, INACTIVE_USER_DAYS
+)
+from app.utils.storage_backends import StorageBackend, create_backend, reminder_eligible
+from app.utils.history_utils import (
+    HistoryColumns, HistoryLog, date_to_day, get_history, merge_history, pack_record, unpack_record
+)
+from app.utils.archive_utils import (
+    ROLLUP_PERIODS, HistoryArchive, UserArchive, combine_history, rollup_history, split_history
+)
+from app.utils.schema_utils import SCHEMA_VERSION, needs_upgrade, new_user_record, upgrade_record
 
 DATA_FILE = "user_data.json"
-lock = Lock()
 logger = logging.getLogger(__name__)
 
-def ensure_data_directory():
-    """Ensure data directory exists."""
-    data_dir = os.path.dirname(DATA_FILE)
-    if data_dir and not os.path.exists(data_dir):
-        os.makedirs(data_dir, exist_ok=True)
+_backend = None
+_backend_lock = Lock()
+_cache = None
 
-def load_data():
-    """Load user data from JSON file with error handling."""
-    with lock:
-        ensure_data_directory()
-        if not os.path.exists(DATA_FILE):
-            logger.info(f"Data file {DATA_FILE} not found, creating new one")
-            return {"users": {}}
-        
+_history_log = None
+_history_lock = RLock()
+_compaction_lock = Lock()
+_pending_history = {}
+_history_seq = 0
+# True while events appended without fsync may not be on disk yet
+_history_unsynced = False
+_compactor = None
+_committer = None
+_history_archive = None
+_user_archive = None
+
+DURABILITY_MODES = ("none", "interval", "group")
+
+# Bump when the layout of the warm restart snapshot changes
+WARM_SNAPSHOT_FORMAT = 1
+
+# user_id -> language for users due the daily reminder; built on first use
+_reminder_index = None
+_reminder_lock = Lock()
+REMINDER_FIELDS = {"reminders", "target", "language"}
+
+# Blocking storage work runs here so handlers never stall the event loop
+_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+
+def _env_float(name: str, default: float) -> float:
+    """Read a numeric setting from the environment, falling back to the default."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return float(default)
+
+def get_storage_path(backend_name: str) -> str:
+    """Return the configured on-disk location for a backend."""
+    if backend_name == "sqlite":
+        return os.getenv("SQLITE_FILE", SQLITE_FILE)
+    if backend_name == "sharded":
+        return os.getenv("SHARD_DIR", SHARD_DIR)
+    if backend_name == "segment":
+        return os.getenv("SEGMENT_DIR", SEGMENT_DIR)
+    if backend_name == "eventlog":
+        return os.getenv("EVENT_LOG_DIR", EVENT_LOG_DIR)
+    return os.getenv("DATA_FILE", DATA_FILE)
+
+def get_storage_codec() -> str:
+    """Return the configured codec name for file-based backends."""
+    return os.getenv("STORAGE_CODEC", STORAGE_CODEC).lower()
+
+def get_durability_mode() -> str:
+    """Return the configured durability mode: "none", "interval" or "group"."""
+    mode = os.getenv("DURABILITY_MODE", DURABILITY_MODE).lower()
+    if mode not in DURABILITY_MODES:
+        logger.warning(f"Invalid DURABILITY_MODE '{mode}', using {DURABILITY_MODE}")
+        return DURABILITY_MODE
+    return mode
+
+def get_backend() -> StorageBackend:
+    """Return the active storage backend, creating it from config on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_name = os.getenv("STORAGE_BACKEND", STORAGE_BACKEND).lower()
+                _backend = create_backend(
+                    backend_name,
+                    get_storage_path(backend_name),
+                    get_storage_codec(),
+                    durable=get_durability_mode() != "none"
+                )
+                logger.info(f"Using {backend_name} storage backend")
+    return _backend
+
+def set_backend(backend: StorageBackend) -> None:
+    """Replace the active storage backend (used by tools and tests)."""
+    global _backend
+    if _cache is not None or _compactor is not None or _committer is not None:
+        shutdown_storage()
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+    _invalidate_reminder_index()
+
+
+class StoreSnapshot(Mapping):
+    """Immutable view of every cached user record as of one cache version.
+
+    Taking a snapshot is O(1): it shares the cache's record table, and the next
+    write after it copies the table (references only) before changing it.
+    Records themselves are never mutated in place, so the view stays consistent
+    for as long as it is held, without blocking writers. Records are returned
+    as read-only mappings.
+    """
+
+    __slots__ = ("version", "_records")
+
+    def __init__(self, records: dict, version: int):
+        self._records = records
+        self.version = version
+
+    def __getitem__(self, user_id: str):
+        return MappingProxyType(self._records[user_id])
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class UserCache:
+    """Process-resident copy of every user record with write-back of changes.
+
+    Reads are served from memory. Updates are applied in memory immediately and
+    queued per user; a background thread writes the queued users to the backend
+    at least every ``flush_interval`` seconds (or sooner once ``max_dirty``
+    users are waiting), so an acknowledged update is never more than one
+    interval away from disk. On the same schedule it checks whether another
+    process has written to the store and, if so, reloads (keeping any of its own
+    updates that are still waiting to be written).
+
+    With a ``snapshot_file`` the decoded records are also pickled to disk every
+    ``snapshot_interval`` seconds and on shutdown, tagged with the backend's
+    fingerprint. A restart whose store still has that fingerprint loads the
+    pickle instead of decoding the store.
+    """
+
+    def __init__(self, backend: StorageBackend, flush_interval: float, max_dirty: int,
+                 snapshot_file: str = "", snapshot_interval: float = 0):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_version = None
+        self._snapshot_due = time.monotonic() + snapshot_interval
+        self.records = {}
+        self.version = 0
+        # Per-user value of self.version at the user's last change; loaded_version for the rest
+        self.user_versions = {}
+        self.loaded_version = 0
+        # True while a snapshot shares self.records; the next write copies it first
+        self._shared = False
+        self.pending = {}
+        # First-write defaults for users the backend may not have yet; flush stores them only if so
+        self.new_users = {}
+        self.dirty_since = None
+        self.lock = RLock()
+        self.flush_lock = Lock()
+        self._wake = Event()
+        self._stopping = Event()
+        self._thread = None
+
+    def load(self, warm: bool = False) -> None:
+        """Load the whole store into memory, from the warm snapshot if ``warm`` and it is current."""
+        with self.flush_lock:
+            records = self._read_warm_snapshot() if warm else None
+            if records is None:
+                data = self.backend.load_all()
+                records = {user_id: unpack_record(record) for user_id, record in data.get("users", {}).items()}
+            with self.lock:
+                # Updates not yet written stay on top of what was read
+                for user_id, updates in self.pending.items():
+                    records[user_id] = {**records.get(user_id, {}), **updates}
+                self.records = records
+                self._shared = False
+                self.version += 1
+                self.user_versions = {}
+                self.loaded_version = self.version
+        # Other workers may have changed reminder fields; only our own writes patch the index
+        _invalidate_reminder_index()
+        logger.info(f"User cache loaded {len(self.records)} users")
+
+    def _snapshot_header(self) -> dict:
+        return {
+            "format": WARM_SNAPSHOT_FORMAT,
+            "schema": SCHEMA_VERSION,
+            "store": [self.backend.name, os.path.abspath(self.backend.path)],
+            "fingerprint": self.backend.fingerprint(),
+        }
+
+    def _read_warm_snapshot(self) -> Optional[dict]:
+        """Return the records saved in the warm snapshot, or None if it is missing or out of date."""
+        if not self.snapshot_file or not os.path.exists(self.snapshot_file):
+            return None
+        # Claim the current version first: a write landing after this is caught by is_stale()
+        self.backend.assume_loaded()
+        expected = self._snapshot_header()
+        if expected["fingerprint"] is None:
+            return None
+        started = time.perf_counter()
         try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Ensure proper structure
-                if "users" not in data:
-                    data = {"users": data} if data else {"users": {}}
-                return data
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in {DATA_FILE}: {e}")
-            # Backup corrupted file
-            backup_file = f"{DATA_FILE}.backup"
-            if os.path.exists(DATA_FILE):
-                os.rename(DATA_FILE, backup_file)
-                logger.info(f"Corrupted file backed up to {backup_file}")
-            return {"users": {}}
+            with open(self.snapshot_file, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    header, records = pickle.loads(view)
         except Exception as e:
-            logger.error(f"Error loading data from {DATA_FILE}: {e}")
-            return {"users": {}}
+            logger.warning(f"Ignoring unreadable warm snapshot {self.snapshot_file}: {e}")
+            return None
+        if header != expected:
+            logger.info("Warm snapshot does not match the store, doing a full load")
+            return None
+        logger.info(f"Loaded {len(records)} users from warm snapshot in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return records
 
-def save_data(data):
-    """Save user data to JSON file with error handling."""
-    with lock:
-        ensure_data_directory()
-        try:
-            # Write to temporary file first
-            temp_file = f"{DATA_FILE}.tmp"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            # Replace original file
-            if os.path.exists(DATA_FILE):
-                os.replace(temp_file, DATA_FILE)
+    def save_snapshot(self) -> bool:
+        """Write the warm restart snapshot. Returns False if the cache is not in sync with the store."""
+        if not self.snapshot_file:
+            return False
+        self.flush()
+        with self.flush_lock:
+            with self.lock:
+                if self.pending or self.backend.is_stale():
+                    return False
+                if self._snapshot_version == self.version:
+                    return True
+                # Records are replaced, never mutated, so sharing the dict is enough to freeze it
+                self._shared = True
+                records, version = self.records, self.version
+                header = self._snapshot_header()
+        if header["fingerprint"] is None:
+            return False
+        temp_file = f"{self.snapshot_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            pickle.dump((header, records), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, self.snapshot_file)
+        self._snapshot_version = version
+        logger.debug(f"Saved warm snapshot of {len(records)} users")
+        return True
+
+    def revalidate(self) -> bool:
+        """Reload if another process changed the store. Returns True if it reloaded."""
+        if not self.backend.is_stale():
+            return False
+        logger.info("Store changed by another process, reloading user cache")
+        self.load()
+        return True
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self.lock:
+            return self.records.get(user_id)
+
+    def all_records(self) -> Dict[str, dict]:
+        with self.lock:
+            return dict(self.records)
+
+    def snapshot(self) -> StoreSnapshot:
+        """Return a consistent read-only view of all records without copying them."""
+        with self.lock:
+            self._shared = True
+            return StoreSnapshot(self.records, self.version)
+
+    def record_version(self, user_id: str) -> int:
+        """Return a number that changes whenever the user's cached record changes."""
+        with self.lock:
+            return self.user_versions.get(user_id, self.loaded_version)
+
+    def _writable_records(self, *user_ids: str) -> dict:
+        # Caller holds self.lock and is about to change the records of user_ids
+        if self._shared:
+            self.records = dict(self.records)
+            self._shared = False
+        self.version += 1
+        for user_id in user_ids:
+            self.user_versions[user_id] = self.version
+        return self.records
+
+    def update(self, user_id: str, updates: dict, defaults: Optional[dict] = None) -> None:
+        """Apply updates in memory and mark the user dirty.
+
+        ``defaults`` fill in the record if the cache has none for the user yet, i.e.
+        on their first write. They are stored on flush unless the backend already
+        has the user (created by another worker since the cache last revalidated).
+        """
+        with self.lock:
+            # Records are replaced rather than mutated so readers never see a half-applied update
+            if defaults is not None and user_id not in self.records:
+                self.new_users[user_id] = defaults
+                record = dict(defaults)
             else:
-                os.rename(temp_file, DATA_FILE)
-                
-        except Exception as e:
-            logger.error(f"Error saving data to {DATA_FILE}: {e}")
-            # Clean up temp file if it exists
-            temp_file = f"{DATA_FILE}.tmp"
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-            raise
+                record = dict(self.records.get(user_id, {}))
+            record.update(updates)
+            self._writable_records(user_id)[user_id] = record
+            self.pending.setdefault(user_id, {}).update(updates)
+            if self.dirty_since is None:
+                self.dirty_since = time.monotonic()
+            if len(self.pending) >= self.max_dirty:
+                self._wake.set()
 
-def get_user_data(user_id: str) -> dict:
-    """Retrieve user data by ID with default values."""
+    def apply_stored(self, user_id: str, updates: dict) -> None:
+        """Reflect fields that were already written to the backend directly."""
+        with self.lock:
+            record = dict(self.records.get(user_id, {}))
+            record.update(updates)
+            # Our own unwritten updates are newer than anything read back from the store
+            record.update(self.pending.get(user_id, {}))
+            self._writable_records(user_id)[user_id] = record
+
+    def evict(self, user_ids) -> None:
+        """Forget users that were deleted from the backend."""
+        with self.lock:
+            user_ids = list(user_ids)
+            records = self._writable_records(*user_ids)
+            for user_id in user_ids:
+                records.pop(user_id, None)
+
+    def replace_all(self, data: dict) -> None:
+        """Replace the whole store, writing through to the backend."""
+        with self.flush_lock:
+            users = data.get("users", {})
+            self.backend.save_all({**data, "users": {user_id: pack_record(record) for user_id, record in users.items()}})
+            with self.lock:
+                self.records = {user_id: unpack_record(record) for user_id, record in users.items()}
+                self._shared = False
+                self.version += 1
+                self.user_versions = {}
+                self.loaded_version = self.version
+                self.pending = {}
+                self.dirty_since = None
+
+    def flush(self) -> int:
+        """Write every dirty user to the backend. Returns the number of users written."""
+        with self.flush_lock:
+            # Closes go straight to the history log, so it is synced even when no user is dirty
+            _sync_history_log()
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                new_users, self.new_users = self.new_users, {}
+                self.dirty_since = None
+            if not pending:
+                return 0
+            packed = {user_id: pack_record(updates) for user_id, updates in pending.items()}
+            try:
+                created = {user_id: packed.pop(user_id) for user_id in new_users if user_id in packed}
+                if created:
+                    self.backend.modify_users(
+                        created,
+                        lambda user_id, record: created[user_id] if record is not None
+                        else {**new_users[user_id], **created[user_id]}
+                    )
+                if packed:
+                    self.backend.update_users(packed)
+            except Exception:
+                # Put the batch back so the next flush retries it; newer updates win
+                with self.lock:
+                    for user_id, defaults in new_users.items():
+                        self.new_users.setdefault(user_id, defaults)
+                    for user_id, updates in pending.items():
+                        merged = dict(updates)
+                        merged.update(self.pending.get(user_id, {}))
+                        self.pending[user_id] = merged
+                    if self.dirty_since is None:
+                        self.dirty_since = time.monotonic()
+                raise
+            logger.debug(f"Flushed {len(pending)} users to {self.backend.name} backend")
+            return len(pending)
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is None and self.flush_interval > 0:
+            self._thread = Thread(target=self._run, name="user-cache-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write out everything still dirty."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.revalidate()
+                if self.snapshot_interval > 0 and time.monotonic() >= self._snapshot_due:
+                    self._snapshot_due = time.monotonic() + self.snapshot_interval
+                    self.save_snapshot()
+            except Exception as e:
+                logger.error(f"Error flushing user cache: {e}")
+
+
+class GroupCommitter:
+    """Coalesces writes that arrive within a short window into one durable commit.
+
+    Callers get a Future that completes once the batch holding their writes has
+    been written and fsynced, so everyone in the batch is acknowledged together
+    and a burst of updates costs one sync instead of one each.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.queue = []
+        self.condition = Condition()
+        self._stopping = False
+        self._thread = Thread(target=self._run, name="group-commit", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, writes: list) -> Future:
+        """Queue ("fields", (user_id, updates)) and ("event", event) writes for the next commit."""
+        future = Future()
+        with self.condition:
+            if self._stopping:
+                raise RuntimeError("Group committer is stopped")
+            self.queue.append((writes, future))
+            self.condition.notify()
+        return future
+
+    def stop(self) -> None:
+        """Commit everything already queued and stop the thread."""
+        with self.condition:
+            self._stopping = True
+            self.condition.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.queue and not self._stopping:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                stopping = self._stopping
+            if not stopping:
+                # Give writes arriving right behind the first one a chance to share its commit
+                time.sleep(self.window)
+            with self.condition:
+                batch, self.queue = self.queue, []
+            try:
+                _commit_writes([write for writes, _ in batch for write in writes])
+            except Exception as e:
+                logger.error(f"Error in group commit of {len(batch)} writes: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+
+def init_storage(flush_interval: float = None) -> None:
+    """Load the store into the in-memory user cache and start background work.
+
+    Without this call every read and write goes straight to the backend. A flush
+    interval of 0 keeps it that way (no cache) while still compacting the history
+    log, for deployments where every read must see other workers' writes at once.
+    """
+    global _cache, _committer
+    if _cache is not None or _compactor is not None or _committer is not None:
+        return
+    if flush_interval is None:
+        flush_interval = _env_float("CACHE_FLUSH_INTERVAL", CACHE_FLUSH_INTERVAL)
+    if flush_interval > 0:
+        max_dirty = int(_env_float("CACHE_MAX_DIRTY", CACHE_MAX_DIRTY))
+        cache = UserCache(
+            get_backend(), flush_interval, max_dirty,
+            snapshot_file=os.getenv("WARM_SNAPSHOT_FILE", WARM_SNAPSHOT_FILE),
+            snapshot_interval=_env_float("WARM_SNAPSHOT_INTERVAL", WARM_SNAPSHOT_INTERVAL)
+        )
+        cache.load(warm=True)
+        cache.start()
+        _cache = cache
+    else:
+        logger.info("User cache disabled, reading and writing the backend directly")
+    if get_durability_mode() == "group":
+        _committer = GroupCommitter(_env_float("GROUP_COMMIT_WINDOW", GROUP_COMMIT_WINDOW))
+        _committer.start()
+        logger.info(f"Group commit enabled with a {_committer.window * 1000:.0f} ms window")
+    _start_history_compactor(_env_float("HISTORY_COMPACT_INTERVAL", HISTORY_COMPACT_INTERVAL))
+    atexit.register(shutdown_storage)
+
+def flush() -> int:
+    """Write all pending cached changes to the backend immediately."""
+    if _cache is None:
+        return 0
+    return _cache.flush()
+
+def shutdown_storage() -> None:
+    """Flush pending changes and stop the background writer."""
+    global _cache, _compactor, _committer
+    if _committer is not None:
+        # Stop before clearing it: the batches drained here must still write through and fsync
+        _committer.stop()
+        _committer = None
+    compactor, _compactor = _compactor, None
+    if compactor is not None:
+        compactor.stop()
+    cache = _cache
+    if cache is None and compactor is None:
+        return
+    try:
+        compact_history()
+    except Exception as e:
+        logger.error(f"Error compacting history log on shutdown: {e}")
+    if cache is None:
+        return
+    _cache = None
     try:
-        data = load_data()
-        user_data = data.get("users", {}).get(user_id, {})
-        
-        # Ensure default values
-        defaults = {
-            "name": "",
-            "language": "en",
-            "currency": "₹",
-            "reminders": True,
-            "history": [],
-            "target": None,
-            "stoploss": None,
-            "start_date": None,
-            "awaiting": None
+        cache.stop()
+        logger.info("User cache flushed on shutdown")
+    except Exception as e:
+        logger.error(f"Error flushing user cache on shutdown: {e}")
+        return
+    try:
+        if cache.save_snapshot():
+            logger.info("Warm restart snapshot saved")
+    except Exception as e:
+        logger.error(f"Error saving warm restart snapshot: {e}")
+
+def get_history_log() -> HistoryLog:
+    """Return the closing balance log, loading any events not yet compacted."""
+    global _history_log
+    if _history_log is None:
+        with _history_lock:
+            if _history_log is None:
+                log = HistoryLog(os.getenv("HISTORY_LOG_FILE", HISTORY_LOG_FILE))
+                events, _ = log.read()
+                for event in events:
+                    _queue_history_event(event)
+                if events:
+                    logger.info(f"Replayed {len(events)} pending balance events from {log.path}")
+                _history_log = log
+    return _history_log
+
+def _sync_history_log() -> None:
+    """Fsync closes appended since the last sync, unless durability is off (interval mode's cache flush)."""
+    global _history_unsynced
+    if not _history_unsynced or get_durability_mode() == "none":
+        return
+    with _history_lock:
+        _history_unsynced = False
+        get_history_log().sync()
+
+def _queue_history_event(event: dict) -> None:
+    global _history_seq
+    _history_seq += 1
+    _pending_history.setdefault(event["u"], []).append((_history_seq, event))
+
+def _log_history_events(events: list, fsync: bool = False) -> None:
+    global _history_unsynced
+    log = get_history_log()
+    with _history_lock:
+        log.append_many(events, fsync=fsync)
+        if not fsync:
+            _history_unsynced = True
+        for event in events:
+            _queue_history_event(event)
+        seq = _history_seq
+    # Without the background compactor, fold the log in every HISTORY_COMPACT_EVENTS events
+    if _compactor is None and seq // HISTORY_COMPACT_EVENTS != (seq - len(events)) // HISTORY_COMPACT_EVENTS:
+        compact_history()
+
+def get_record_version(user_id: str) -> Optional[tuple]:
+    """Return a token that changes whenever get_user_data(user_id) may return something new.
+
+    Read it before the record to key anything derived from the record. None
+    without the user cache, where other processes' writes can't be noticed.
+    """
+    if _cache is None:
+        return None
+    get_history_log()
+    with _history_lock:
+        pending = _pending_history.get(user_id)
+        last_event = pending[-1][0] if pending else 0
+    return (_cache.record_version(user_id), last_event)
+
+def _pending_history_events(user_id: str) -> list:
+    get_history_log()
+    with _history_lock:
+        return [event for _, event in _pending_history.get(user_id, [])]
+
+def _fold_history(record: dict, events: list) -> dict:
+    """Return the history fields of a record after applying balance events."""
+    updates = {"history": merge_history(record.get("history"), events)}
+    if any("h" in event for event in events):
+        # A replaced history (e.g. /reset) starts without archived days
+        updates["history_archive"] = None
+    return updates
+
+def compact_history() -> int:
+    """Fold pending balance events into the main store and trim the log.
+
+    Events are read back from the log file under its lock, so events appended
+    by other processes sharing the log are applied rather than dropped, and each
+    history is merged against the stored record inside one backend transaction.
+    Returns the number of users whose history was rewritten.
+    """
+    with _compaction_lock:
+        log = get_history_log()
+        with _history_lock:
+            seq_limit = _history_seq
+
+        with log.lock.hold():
+            events, offset = log.read()
+            batch = {}
+            for event in events:
+                batch.setdefault(event["u"], []).append(event)
+            if batch:
+                def fold(user_id, record):
+                    if record is None:
+                        record = _first_write_defaults(user_id) or {}
+                        return pack_record({**record, **_fold_history(record, batch[user_id])})
+                    return pack_record(_fold_history(record, batch[user_id]))
+
+                applied = get_backend().modify_users(batch, fold)
+                if _cache is not None:
+                    for user_id, updates in applied.items():
+                        _cache.apply_stored(user_id, unpack_record(updates))
+            if offset:
+                log.discard_prefix(offset)
+
+        with _history_lock:
+            for user_id in list(_pending_history):
+                remaining = [(seq, event) for seq, event in _pending_history[user_id] if seq > seq_limit]
+                if remaining:
+                    _pending_history[user_id] = remaining
+                else:
+                    del _pending_history[user_id]
+        logger.debug(f"Compacted history log for {len(batch)} users")
+        return len(batch)
+
+
+class _HistoryCompactor:
+    """Background thread that periodically folds the history log into the store.
+
+    Every ``tier_interval`` seconds it also moves old closes to the archive.
+    """
+
+    def __init__(self, interval: float, tier_interval: float = 0):
+        self.interval = interval
+        self.tier_interval = tier_interval
+        self._tier_due = time.monotonic() + tier_interval
+        self._stopping = Event()
+        self._thread = Thread(target=self._run, name="history-compactor", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._thread.join(timeout=self.interval + 5)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                compact_history()
+            except Exception as e:
+                logger.error(f"Error compacting history log: {e}")
+            if self.tier_interval > 0 and time.monotonic() >= self._tier_due:
+                self._tier_due = time.monotonic() + self.tier_interval
+                try:
+                    tier_history()
+                except Exception as e:
+                    logger.error(f"Error archiving old history: {e}")
+                try:
+                    archive_inactive_users()
+                except Exception as e:
+                    logger.error(f"Error archiving inactive users: {e}")
+
+def _start_history_compactor(interval: float) -> None:
+    global _compactor
+    if _compactor is None and interval > 0:
+        _compactor = _HistoryCompactor(interval, _env_float("HISTORY_TIER_INTERVAL", HISTORY_TIER_INTERVAL))
+        _compactor.start()
+
+def get_history_archive() -> HistoryArchive:
+    """Return the cold archive of old daily closes."""
+    global _history_archive
+    if _history_archive is None:
+        _history_archive = HistoryArchive(os.getenv("HISTORY_ARCHIVE_DIR", HISTORY_ARCHIVE_DIR))
+    return _history_archive
+
+def get_rollup_period() -> str:
+    """Return the configured rollup period for archived history: "week" or "month"."""
+    period = os.getenv("HISTORY_ROLLUP_PERIOD", HISTORY_ROLLUP_PERIOD).lower()
+    if period not in ROLLUP_PERIODS:
+        logger.warning(f"Invalid HISTORY_ROLLUP_PERIOD '{period}', using {HISTORY_ROLLUP_PERIOD}")
+        return HISTORY_ROLLUP_PERIOD
+    return period
+
+def tier_history(hot_days: int = None, period: str = None, batch_size: int = 1000) -> int:
+    """Move closes older than ``hot_days`` before each user's latest close to the archive.
+
+    The archive file is written and synced before the record is trimmed, and the
+    record keeps a week/month rollup of everything archived. Users with balance
+    events still waiting in the log are skipped until the next run. Returns the
+    number of users whose history was archived.
+    """
+    if hot_days is None:
+        hot_days = int(_env_float("HISTORY_HOT_DAYS", HISTORY_HOT_DAYS))
+    if hot_days <= 0:
+        return 0
+    period = period or get_rollup_period()
+    archive = get_history_archive()
+    log = get_history_log()
+    compact_history()
+
+    candidates = []
+    for user_id, record in iter_users():
+        history = HistoryColumns.decode(record.get("history"))
+        if history and history.days[0] <= history.days[-1] - hot_days:
+            candidates.append(user_id)
+
+    def archive_old_days(user_id, record):
+        if record is None:
+            return None
+        history = HistoryColumns.decode(record.get("history"))
+        if not history:
+            return None
+        cold, hot = split_history(history, history.days[-1] - hot_days + 1)
+        if not cold:
+            return None
+        info = record.get("history_archive")
+        # Without an archive marker any leftover file belongs to an earlier, reset history
+        archived = combine_history(archive.read(user_id, info["through"]) if info else HistoryColumns(), cold)
+        archive.write(user_id, archived)
+        return pack_record({
+            "history": hot,
+            "history_archive": {
+                "through": archived.days[-1],
+                "period": period,
+                "rollup": rollup_history(archived, period)
+            }
+        })
+
+    tiered = 0
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        with _compaction_lock, log.lock.hold():
+            # Pending events could replace a history we are about to split
+            events, _ = log.read()
+            busy = {event["u"] for event in events}
+            applied = get_backend().modify_users([user_id for user_id in batch if user_id not in busy], archive_old_days)
+            if _cache is not None:
+                for user_id, updates in applied.items():
+                    _cache.apply_stored(user_id, unpack_record(updates))
+        tiered += len(applied)
+    if tiered:
+        logger.info(f"Archived history older than {hot_days} days for {tiered} users")
+    return tiered
+
+def get_user_archive() -> UserArchive:
+    """Return the cold store for inactive users."""
+    global _user_archive
+    if _user_archive is None:
+        _user_archive = UserArchive(os.getenv("USER_ARCHIVE_DIR", USER_ARCHIVE_DIR))
+    return _user_archive
+
+def archive_users(user_ids, reason: str, batch_size: int = 100) -> int:
+    """Move users from the hot store into cold storage. Returns the number moved.
+
+    Each record is written to the archive before it is deleted, and only deleted
+    if nobody changed it in between; users with unwritten changes or balance
+    events still in the log stay hot until a later run.
+    """
+    archive = get_user_archive()
+    log = get_history_log()
+    backend = get_backend()
+    user_ids = list(user_ids)
+    moved = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        with _compaction_lock, log.lock.hold():
+            events, _ = log.read()
+            busy = {event["u"] for event in events}
+            flush()
+            records = {}
+
+            def collect(user_id, record):
+                if record is not None:
+                    records[user_id] = record
+
+            backend.modify_users([user_id for user_id in batch if user_id not in busy], collect)
+            for user_id, record in records.items():
+                archive.write(user_id, record, reason)
+            if _cache is not None:
+                with _cache.lock:
+                    deleted = backend.delete_users(
+                        {user_id: record for user_id, record in records.items() if user_id not in _cache.pending}
+                    )
+                    _cache.evict(deleted)
+            else:
+                deleted = backend.delete_users(records)
+            for user_id in records.keys() - set(deleted):
+                archive.remove(user_id)
+        moved += len(deleted)
+    if moved:
+        _invalidate_reminder_index()
+        logger.info(f"Moved {moved} users to cold storage ({reason})")
+    return moved
+
+def _last_activity(record: dict) -> Optional[int]:
+    """Return the epoch day of a user's latest close (or target start), or None if unknown."""
+    days = []
+    history = HistoryColumns.decode(record.get("history"))
+    if history:
+        days.append(history.days[-1])
+    if record.get("history_archive"):
+        days.append(record["history_archive"]["through"])
+    if record.get("start_date"):
+        days.append(date_to_day(record["start_date"]))
+    return max(days) if days else None
+
+def archive_inactive_users(inactive_days: int = None) -> int:
+    """Move users with no close for ``inactive_days`` days to cold storage."""
+    if inactive_days is None:
+        inactive_days = int(_env_float("INACTIVE_USER_DAYS", INACTIVE_USER_DAYS))
+    if inactive_days <= 0:
+        return 0
+    cutoff = date_to_day(date.today().isoformat()) - inactive_days
+    inactive = []
+    for user_id, record in iter_users():
+        last = _last_activity(record)
+        if last is not None and last < cutoff:
+            inactive.append(user_id)
+    return archive_users(inactive, "inactive") if inactive else 0
+
+def _rehydrate(cold: dict, hot: Optional[dict]) -> dict:
+    """Combine an archived record with anything written for the user after it was archived."""
+    if hot is None:
+        return cold
+    merged = {**cold, **hot}
+    if "history" in cold and "history" in hot:
+        merged["history"] = combine_history(
+            HistoryColumns.decode(cold["history"]), HistoryColumns.decode(hot["history"])
+        ).encode()
+    return merged
+
+def get_full_history(user_id: str, user_data: dict) -> HistoryColumns:
+    """Return a user's complete history, reading archived days back from the cold tier."""
+    history = get_history(user_data)
+    info = user_data.get("history_archive")
+    if not info:
+        return history
+    return combine_history(get_history_archive().read(user_id, info["through"]), history)
+
+def load_data():
+    """Load all user data."""
+    if _cache is not None:
+        return {"users": _cache.all_records()}
+    backend = get_backend()
+    if backend.is_stale():
+        # load_all marks the store as seen, which would hide the change from get_reminder_recipients
+        _invalidate_reminder_index()
+    data = backend.load_all()
+    return {**data, "users": {user_id: unpack_record(record) for user_id, record in data.get("users", {}).items()}}
+
+def snapshot() -> Mapping:
+    """Return a consistent, read-only {user_id: record} view for long scans.
+
+    With the cache this is an O(1) copy-on-write StoreSnapshot; without it the
+    store is read once.
+    """
+    if _cache is not None:
+        return _cache.snapshot()
+    return MappingProxyType(load_data()["users"])
+
+def iter_users() -> Iterator[Tuple[str, dict]]:
+    """Yield (user_id, record) for every user without loading the whole store at once."""
+    if _cache is not None:
+        yield from snapshot().items()
+        return
+    for user_id, record in get_backend().iter_users():
+        yield user_id, unpack_record(record)
+
+def get_archived_user_ids(exclude_reasons=()) -> List[str]:
+    """Return the ids of users in cold storage, leaving out those archived for any of ``exclude_reasons``."""
+    return [user_id for user_id, reason in get_user_archive().iter_reasons() if reason not in exclude_reasons]
+
+def get_users(user_ids) -> Dict[str, dict]:
+    """Return {user_id: record} for the given stored users, for read-only bulk jobs.
+
+    Unlike get_user_data the records are neither copied nor upgraded, and unknown
+    users are left out. Closing balances still only in the history log are merged in.
+    """
+    if _cache is not None:
+        records = _cache.snapshot()
+        users = {user_id: records[user_id] for user_id in user_ids if user_id in records}
+    else:
+        backend = get_backend()
+        users = {}
+        for user_id in user_ids:
+            record = backend.get_user(user_id)
+            if record is not None:
+                users[user_id] = unpack_record(record)
+    get_history_log()
+    with _history_lock:
+        pending = {
+            user_id: [event for _, event in _pending_history[user_id]]
+            for user_id in users if user_id in _pending_history
         }
-        
-        for key, default_value in defaults.items():
-            if key not in user_data:
-                user_data[key] = default_value
-        
+    for user_id, events in pending.items():
+        users[user_id] = {**users[user_id], **_fold_history(users[user_id], events)}
+    return users
+
+def save_data(data):
+    """Replace all user data."""
+    if _cache is not None:
+        _cache.replace_all(data)
+    else:
+        users = data.get("users", {})
+        get_backend().save_all({**data, "users": {user_id: pack_record(record) for user_id, record in users.items()}})
+    _invalidate_reminder_index()
+
+def _upgrade_stored_record(user_id: str) -> Optional[dict]:
+    """Migrate a user's stored record to the current schema, persisting it once.
+
+    A user in cold storage is brought back into the hot store here as well.
+    """
+    archive = get_user_archive()
+    stored = {}
+
+    def upgrade(_, record):
+        cold = archive.read(user_id)
+        if cold is not None:
+            stored["rehydrated"] = True
+            record = _rehydrate(cold, record)
+        elif record is None:
+            stored["record"] = None
+            return None
+        stored["record"] = upgraded = upgrade_record(record) if needs_upgrade(record) else record
+        return upgraded if cold is not None or upgraded is not record else None
+
+    applied = get_backend().modify_users([user_id], upgrade)
+    if stored.get("rehydrated"):
+        archive.remove(user_id)
+        logger.info(f"Restored user {user_id} from cold storage")
+    elif applied:
+        logger.info(f"Upgraded user {user_id} to schema version {SCHEMA_VERSION}")
+    record = unpack_record(stored["record"])
+    if _cache is not None and record is not None:
+        _cache.apply_stored(user_id, record)
+        record = _cache.get(user_id)
+    if applied or stored.get("rehydrated"):
+        # The written record can change reminder eligibility (a filled-in default, a restored user)
+        _refresh_reminder_entry(user_id)
+    return record
+
+def get_user_data(user_id: str) -> dict:
+    """Retrieve user data by ID, upgrading an old record the first time it is read."""
+    try:
+        if _cache is not None:
+            record = _cache.get(user_id)
+        else:
+            record = unpack_record(get_backend().get_user(user_id))
+
+        if needs_upgrade(record) and (record is not None or get_user_archive().contains(user_id)):
+            record = _upgrade_stored_record(user_id)
+
+        if record is None:
+            user_data = new_user_record()
+        else:
+            # Hand out a copy so callers can't change the cached record (or a backend's
+            # in-memory state, as eventlog keeps) behind its back
+            user_data = copy.deepcopy(record)
+
+        # Merge closing balances that are still only in the history log
+        events = _pending_history_events(user_id)
+        if events:
+            user_data.update(_fold_history(user_data, events))
         return user_data
     except Exception as e:
         logger.error(f"Error getting user data for {user_id}: {e}")
-        return {
-            "name": "",
-            "language": "en",
-            "currency": "₹",
-            "reminders": True,
-            "history": [],
-            "target": None,
-            "stoploss": None,
-            "start_date": None,
-            "awaiting": None
-        }
+        return new_user_record()
+
+def _prepare_writes(user_id: str, updates: dict, history_entries: list = ()) -> list:
+    """Turn one user's changes into the writes a commit applies, in order."""
+    writes = [("event", {"u": user_id, "d": date, "b": balance}) for date, balance in history_entries]
+    if "history" in updates:
+        # History only changes through the log so replay order stays correct
+        updates = dict(updates)
+        writes.append(("event", {"u": user_id, "h": HistoryColumns.decode(updates.pop("history")).encode()}))
+    if updates:
+        writes.append(("fields", (user_id, copy.deepcopy(updates))))
+    return writes
+
+def _first_write_defaults(user_id: str) -> Optional[dict]:
+    """Fields to store with a user's first write: the current-schema record get_user_data served them.
+
+    History is left out because it only changes through the log. None for users in
+    cold storage, whose archived record is merged back in on their next read instead.
+    """
+    if get_user_archive().contains(user_id):
+        return None
+    record = new_user_record()
+    del record["history"]
+    return record
+
+def _commit_writes(writes: list, fsync: bool = True) -> None:
+    """Apply prepared writes: balance events to the log, fields to the cache or backend."""
+    events = [payload for kind, payload in writes if kind == "event"]
+    if events:
+        _log_history_events(events, fsync=fsync)
+
+    changes = {}
+    for kind, payload in writes:
+        if kind == "fields":
+            user_id, updates = payload
+            changes.setdefault(user_id, {}).update(updates)
+    if not changes:
+        return
+    if _committer is not None or _cache is None:
+        # Group mode writes through so the commit is durable when acknowledged
+        packed = {user_id: pack_record(updates) for user_id, updates in changes.items()}
+
+        def merge(user_id, record):
+            if record is None:
+                return {**(_first_write_defaults(user_id) or {}), **packed[user_id]}
+            return packed[user_id]
+
+        applied = get_backend().modify_users(packed, merge)
+        if _cache is not None:
+            for user_id, updates in applied.items():
+                _cache.apply_stored(user_id, unpack_record(updates))
+    else:
+        for user_id, updates in changes.items():
+            defaults = _first_write_defaults(user_id) if _cache.get(user_id) is None else None
+            _cache.update(user_id, updates, defaults)
+    for user_id, updates in changes.items():
+        if REMINDER_FIELDS.intersection(updates):
+            _refresh_reminder_entry(user_id)
+
+def _write(user_id: str, updates: dict, history_entries: list = ()) -> None:
+    writes = _prepare_writes(user_id, updates, history_entries)
+    if not writes:
+        return
+    if _committer is not None:
+        _committer.submit(writes).result()
+    else:
+        # Without a cache there is no flush to sync the log, so match the backend's per-write fsync
+        _commit_writes(writes, fsync=_cache is None and get_durability_mode() != "none")
 
 def update_user_data(user_id: str, updates: dict) -> None:
     """Update user data with new values."""
     try:
-        data = load_data()
-        if "users" not in data:
-            data["users"] = {}
-        if user_id not in data["users"]:
-            data["users"][user_id] = {}
-        
-        data["users"][user_id].update(updates)
-        save_data(data)
+        _write(user_id, updates)
         logger.debug(f"Updated user data for {user_id}: {list(updates.keys())}")
     except Exception as e:
         logger.error(f"Error updating user data for {user_id}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def _invalidate_reminder_index() -> None:
+    global _reminder_index
+    with _reminder_lock:
+        _reminder_index = None
+
+def _refresh_reminder_entry(user_id: str) -> None:
+    """Re-check one user's reminder eligibility after a relevant field changed."""
+    with _reminder_lock:
+        if _reminder_index is None:
+            return
+        record = (_cache.get(user_id) if _cache is not None else get_backend().get_user(user_id)) or {}
+        if reminder_eligible(record):
+            _reminder_index[user_id] = record.get("language", "en")
+        else:
+            _reminder_index.pop(user_id, None)
+
+def get_reminder_recipients() -> Dict[str, str]:
+    """Return {user_id: language} for users with reminders on and an active target.
+
+    The set is built once from the store and then kept current by update_user_data,
+    so the daily job never has to load or scan every record. Writes by other
+    worker processes are picked up by rebuilding it once the store is stale.
+    """
+    global _reminder_index
+    if _cache is not None:
+        # Reloading the cache drops the index, so another worker's opt-out is seen now
+        _cache.revalidate()
+    with _reminder_lock:
+        if _reminder_index is not None and _cache is None and get_backend().is_stale():
+            _reminder_index = None
+        if _reminder_index is None:
+            if _cache is not None:
+                records = _cache.snapshot()
+                _reminder_index = {
+                    user_id: record.get("language", "en")
+                    for user_id, record in records.items()
+                    if reminder_eligible(record)
+                }
+            else:
+                backend = get_backend()
+                # Claim the version first: a write landing during the scan makes the store stale again
+                backend.assume_loaded()
+                _reminder_index = backend.reminder_recipients()
+            logger.info(f"Built reminder index with {len(_reminder_index)} users")
+        return dict(_reminder_index)
+
+def append_history(user_id: str, date: str, balance: float) -> None:
+    """Record a closing balance for a date as a single append to the history log."""
+    try:
+        _write(user_id, {}, [(date, balance)])
+        logger.debug(f"Logged closing balance for {user_id} on {date}")
+    except Exception as e:
+        logger.error(f"Error logging closing balance for {user_id}: {e}")
+        raise
+
+def commit_user_data(user_id: str, updates: dict, history_entries: list = ()) -> None:
+    """Apply a batch of field updates and closing balances for one user in one call."""
+    try:
+        _write(user_id, updates, history_entries)
+    except Exception as e:
+        logger.error(f"Error committing user data for {user_id}: {e}")
+        raise
+
+async def run_in_storage_executor(func, *args, **kwargs):
+    """Run a blocking storage-bound call on the storage thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+async def async_load_data():
+    """Non-blocking variant of load_data for async handlers."""
+    return await run_in_storage_executor(load_data)
+
+async def async_iter_users(batch_size: int = 500) -> AsyncIterator[Tuple[str, dict]]:
+    """Non-blocking variant of iter_users; reads ``batch_size`` users at a time."""
+    users = iter_users()
+    while True:
+        batch = await run_in_storage_executor(lambda: list(itertools.islice(users, batch_size)))
+        if not batch:
+            return
+        for user_id, record in batch:
+            yield user_id, record
+
+async def async_get_archived_user_ids(exclude_reasons=()) -> List[str]:
+    """Non-blocking variant of get_archived_user_ids."""
+    return await run_in_storage_executor(get_archived_user_ids, exclude_reasons)
+
+async def async_get_reminder_recipients() -> Dict[str, str]:
+    """Non-blocking variant of get_reminder_recipients for async jobs."""
+    return await run_in_storage_executor(get_reminder_recipients)
+
+async def async_archive_users(user_ids, reason: str) -> int:
+    """Non-blocking variant of archive_users for async handlers."""
+    return await run_in_storage_executor(archive_users, user_ids, reason)
+
+async def async_get_user_data(user_id: str) -> dict:
+    """Non-blocking variant of get_user_data for async handlers."""
+    return await run_in_storage_executor(get_user_data, user_id)
+
+async def async_update_user_data(user_id: str, updates: dict) -> None:
+    """Non-blocking variant of update_user_data for async handlers."""
+    await run_in_storage_executor(update_user_data, user_id, updates)
+
+async def async_append_history(user_id: str, date: str, balance: float) -> None:
+    """Non-blocking variant of append_history for async handlers."""
+    await run_in_storage_executor(append_history, user_id, date, balance)
+
+async def async_commit_user_data(user_id: str, updates: dict, history_entries: list = ()) -> None:
+    """Non-blocking variant of commit_user_data for async handlers."""
+    if _committer is not None:
+        # Wait for the group commit without tying up a storage thread
+        writes = _prepare_writes(user_id, updates, list(history_entries))
+        if writes:
+            await asyncio.wrap_future(_committer.submit(writes))
+        return
+    await run_in_storage_executor(commit_user_data, user_id, updates, list(history_entries))
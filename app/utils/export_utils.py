@@ -1,21 +1,24 @@
 # app/utils/export_utils.py
 from openpyxl import Workbook
 from io import BytesIO
-from datetime import datetime
-from app.utils.data_utils import get_user_data
-from app.utils.calculation_utils import calculate_compounding
+import numpy as np
+from app.utils.calculation_utils import expected_balance_series
+from app.utils.history_utils import HistoryColumns, get_history, date_to_day
 
-def generate_excel_report(user_id: str) -> BytesIO:
-    """Generate Excel report for user progress."""
-    user_data = get_user_data(user_id)
-    if not user_data.get("history"):
+def generate_excel_report(user_data: dict, history: HistoryColumns = None) -> BytesIO:
+    """Generate Excel report for user progress.
+
+    Pass ``history`` to include archived days; by default only the inline history is used.
+    """
+    if history is None:
+        history = get_history(user_data)
+    if not history:
         return None
 
     language = user_data.get("language", "en")
     currency = user_data.get("currency", "₹")
     target = user_data.get("target", {})
     start_date = user_data.get("start_date")
-    history = user_data.get("history", [])
     stoploss = user_data.get("stoploss")
 
     wb = Workbook()
@@ -32,16 +35,18 @@ def generate_excel_report(user_id: str) -> BytesIO:
     ws.append(headers)
 
     # Data
-    for entry in history:
-        date = entry["date"]
-        balance = entry["balance"]
-        days_passed = (datetime.strptime(date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days
-        expected_balance = calculate_compounding(
+    start_day = date_to_day(start_date) if start_date else history.days[0]
+    days_passed = np.frombuffer(history.days, dtype=np.int32).astype(np.int64) - start_day
+    if target:
+        expected_balances = expected_balance_series(
             float(target.get("start_amount", 0)),
             float(target.get("rate", 0)),
             target.get("mode", "daily"),
             days_passed
-        ) if target else 0.0
+        )
+    else:
+        expected_balances = np.zeros(len(history))
+    for date, balance, expected_balance in zip(history.dates(), history.balances, expected_balances.tolist()):
         stoploss_status = ""
         if stoploss and target:
             stoploss_level = float(target["start_amount"]) * (1 - stoploss / 100)
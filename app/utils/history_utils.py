@@ -0,0 +1,240 @@
+# app/utils/history_utils.py
+import base64
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from datetime import date
+from typing import List, Optional, Tuple
+import logging
+from app.utils.lock_utils import ProcessLock
+
+logger = logging.getLogger(__name__)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def date_to_day(value: str) -> int:
+    """Convert a YYYY-MM-DD string to days since 1970-01-01."""
+    return date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+
+def day_to_date(day: int) -> str:
+    """Convert days since 1970-01-01 back to a YYYY-MM-DD string."""
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+def _pack_array(values: array) -> str:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+def _unpack_array(typecode: str, encoded: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(encoded))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class HistoryColumns(Sequence):
+    """Immutable columnar balance history: epoch-day int32s and float64 balances.
+
+    Stored as ``{"days": <base64>, "balances": <base64>}`` (little-endian) instead of
+    one JSON object per day. ``days`` and ``balances`` are read-only memoryviews that
+    can be handed to ``numpy.frombuffer`` without copying. Indexing still yields
+    ``{"date", "balance"}`` dicts for code that expects the old list layout.
+    """
+
+    __slots__ = ("_days", "_balances")
+
+    def __init__(self, days: array = None, balances: array = None):
+        self._days = days if days is not None else array("i")
+        self._balances = balances if balances is not None else array("d")
+
+    @classmethod
+    def from_entries(cls, entries) -> "HistoryColumns":
+        """Build columns from a list of {"date", "balance"} dicts."""
+        rows = sorted((date_to_day(entry["date"]), float(entry["balance"])) for entry in entries)
+        return cls(array("i", [day for day, _ in rows]), array("d", [balance for _, balance in rows]))
+
+    @classmethod
+    def decode(cls, value) -> "HistoryColumns":
+        """Accept stored columns, a legacy list of entries, or an existing instance."""
+        if isinstance(value, cls):
+            return value
+        if not value:
+            return cls()
+        if isinstance(value, dict):
+            return cls(_unpack_array("i", value["days"]), _unpack_array("d", value["balances"]))
+        return cls.from_entries(value)
+
+    def encode(self) -> dict:
+        """Return the compact JSON-serializable form."""
+        return {"days": _pack_array(self._days), "balances": _pack_array(self._balances)}
+
+    @property
+    def days(self) -> memoryview:
+        return memoryview(self._days).toreadonly()
+
+    @property
+    def balances(self) -> memoryview:
+        return memoryview(self._balances).toreadonly()
+
+    def dates(self) -> List[str]:
+        return [day_to_date(day) for day in self._days]
+
+    @property
+    def last_balance(self) -> Optional[float]:
+        return self._balances[-1] if self._balances else None
+
+    def with_balance(self, value: str, balance: float) -> "HistoryColumns":
+        """Return a copy with the closing balance for a date set (inserted or replaced)."""
+        day = date_to_day(value)
+        days, balances = array("i", self._days), array("d", self._balances)
+        if not days or days[-1] < day:
+            days.append(day)
+            balances.append(float(balance))
+        else:
+            index = bisect_left(days, day)
+            if index < len(days) and days[index] == day:
+                balances[index] = float(balance)
+            else:
+                days.insert(index, day)
+                balances.insert(index, float(balance))
+        return HistoryColumns(days, balances)
+
+    def to_entries(self) -> List[dict]:
+        return [{"date": day_to_date(day), "balance": balance} for day, balance in zip(self._days, self._balances)]
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_entries()[index]
+        return {"date": day_to_date(self._days[index]), "balance": self._balances[index]}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, HistoryColumns):
+            return self._days == other._days and self._balances == other._balances
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoryColumns({len(self)} entries)"
+
+    # Instances are never mutated, so copies can share them
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+def pack_record(record: dict) -> dict:
+    """Return a record with its history in the stored columnar form."""
+    if record is None or "history" not in record:
+        return record
+    return {**record, "history": HistoryColumns.decode(record["history"]).encode()}
+
+def unpack_record(record: dict) -> dict:
+    """Return a record with its history as a HistoryColumns view."""
+    if record is None or "history" not in record:
+        return record
+    return {**record, "history": HistoryColumns.decode(record["history"])}
+
+def get_history(user_data: dict) -> HistoryColumns:
+    """Return the read-only history view for a user record."""
+    return HistoryColumns.decode(user_data.get("history"))
+
+def apply_history_event(history: HistoryColumns, event: dict) -> HistoryColumns:
+    """Apply one logged balance event to a history and return the result.
+
+    ``{"u": id, "h": ...}`` replaces the whole history; ``{"u": id, "d": date, "b": balance}``
+    records the closing balance for a date, overwriting an existing entry for that date.
+    Applying the same events twice gives the same result, so replay after a crash is safe.
+    """
+    if "h" in event:
+        return HistoryColumns.decode(event["h"])
+    return HistoryColumns.decode(history).with_balance(event["d"], event["b"])
+
+def merge_history(history, events: list) -> HistoryColumns:
+    """Return the history with the given events applied in order."""
+    merged = HistoryColumns.decode(history)
+    for event in events:
+        merged = apply_history_event(merged, event)
+    return merged
+
+
+class HistoryLog:
+    """Append-only JSON Lines log of closing balance events.
+
+    Each close is one small sequential append. The log is periodically folded
+    into the main store and the applied prefix dropped. Every process appending
+    to the same file shares ``lock``; hold it across read and discard_prefix so
+    no other process's events are dropped unapplied.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = ProcessLock(f"{path}.lock")
+
+    def append(self, event: dict) -> None:
+        self.append_many([event])
+
+    def append_many(self, events: List[dict], fsync: bool = False) -> None:
+        """Append events in one write; with ``fsync`` they are on disk when this returns."""
+        lines = "".join(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events)
+        with self.lock.hold():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def sync(self) -> None:
+        """Force events appended without ``fsync`` onto disk."""
+        with self.lock.hold():
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "rb") as f:
+                os.fsync(f.fileno())
+
+    def read(self) -> Tuple[List[dict], int]:
+        """Return every complete event in the log and the byte offset they end at."""
+        events = []
+        offset = 0
+        with self.lock.hold():
+            if not os.path.exists(self.path):
+                return events, 0
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        # Torn write from a crash; ignore the partial line
+                        logger.warning(f"Ignoring incomplete trailing entry in {self.path}")
+                        break
+                    offset += len(raw)
+                    try:
+                        events.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Skipping corrupt entry in {self.path}: {e}")
+        return events, offset
+
+    def size(self) -> int:
+        with self.lock.hold():
+            return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def discard_prefix(self, offset: int) -> None:
+        """Drop the first ``offset`` bytes, keeping anything appended after them."""
+        with self.lock.hold():
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            temp_file = f"{self.path}.tmp"
+            with open(temp_file, "wb") as f:
+                f.write(tail)
+                # A torn rewrite would lose events appended after the compacted prefix
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
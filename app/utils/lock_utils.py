@@ -0,0 +1,94 @@
+# app/utils/lock_utils.py
+import os
+from contextlib import contextmanager
+from threading import RLock
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+    logger.warning("fcntl not available, storage locks will not coordinate separate processes")
+
+
+class ProcessLock:
+    """Exclusive advisory lock shared by every thread and process using the same lock file.
+
+    Re-entrant within a thread, so a method holding the lock can call helpers that
+    take it again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = RLock()
+        self._depth = 0
+        self._file = None
+
+    @contextmanager
+    def hold(self):
+        with self._thread_lock:
+            if self._depth == 0:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "ab")
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
+
+
+class VersionCounter:
+    """Change counter kept in a small file next to a store.
+
+    Every write to the store bumps the counter while holding the store's
+    ProcessLock, so a reader can tell whether anyone else wrote since it last
+    loaded by comparing the counter with the value it saw.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.seen = None
+        self.stale = False
+
+    def read(self) -> int:
+        try:
+            with open(self.path, "r", encoding="ascii") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            return -1
+
+    def mark_loaded(self, version: int) -> None:
+        """Record the version a full load started from."""
+        self.seen = version
+        self.stale = False
+
+    def bump(self) -> int:
+        """Increment the counter; the caller must hold the store's lock."""
+        current = self.read()
+        if current != self.seen:
+            # Someone else wrote since our last load or write
+            self.stale = True
+        version = max(current, 0) + 1
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, "w", encoding="ascii") as f:
+            f.write(str(version))
+        os.replace(temp_file, self.path)
+        self.seen = version
+        return version
+
+    def is_stale(self) -> bool:
+        """True if another writer changed the store since our last load."""
+        return self.stale or self.read() != self.seen
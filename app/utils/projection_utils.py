@@ -0,0 +1,125 @@
+# app/utils/projection_utils.py
+import logging
+import math
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from app.config.constants import PROJECTION_MAX_DAYS
+from app.utils.calculation_utils import IST, _periodic_rate
+from app.utils.history_utils import date_to_day, day_to_date, get_history
+
+logger = logging.getLogger(__name__)
+
+# Fewer closes than this give a realized rate too noisy to project from
+MIN_REGRESSION_POINTS = 3
+
+def daily_log_growth(rate: float, mode: str) -> float:
+    """Return the planned growth per day as a log factor: balance(d) = start * exp(g * d)."""
+    periodic_rate, days_per_period = _periodic_rate(rate, mode)
+    return math.log1p(periodic_rate) / days_per_period
+
+def rate_from_log_growth(growth: float, mode: str) -> float:
+    """Convert a daily log growth back to an annual percentage rate in the given mode."""
+    _, days_per_period = _periodic_rate(0, mode)
+    periods_per_year = 365 if mode == "daily" else 12
+    return math.expm1(growth * days_per_period) * periods_per_year * 100
+
+def days_to_reach(balance: float, target_amount: float, growth: float) -> Optional[float]:
+    """Days for ``balance`` to grow to ``target_amount`` at daily log growth ``growth``.
+
+    0 if it is already there, None if it never gets there or not within
+    PROJECTION_MAX_DAYS (beyond that the date can't even be represented).
+    """
+    if balance >= target_amount:
+        return 0.0
+    if balance <= 0 or growth <= 0:
+        return None
+    days = math.log(target_amount / balance) / growth
+    return days if days <= PROJECTION_MAX_DAYS else None
+
+def realized_log_growth(history) -> Optional[dict]:
+    """Fit ln(balance) = a + g * day over the history by least squares.
+
+    Returns {"growth", "r_squared", "points"} or None when there are too few
+    positive closes to fit.
+    """
+    days = np.frombuffer(history.days, dtype=np.int32).astype(np.float64)
+    balances = np.frombuffer(history.balances, dtype=np.float64)
+    positive = balances > 0
+    if np.count_nonzero(positive) < MIN_REGRESSION_POINTS:
+        return None
+    x = days[positive] - days[positive][0]
+    y = np.log(balances[positive])
+    x_centered = x - x.mean()
+    y_centered = y - y.mean()
+    spread = np.dot(x_centered, x_centered)
+    if spread == 0:
+        return None
+    growth = float(np.dot(x_centered, y_centered) / spread)
+    total = np.dot(y_centered, y_centered)
+    residual = y_centered - growth * x_centered
+    r_squared = float(1 - np.dot(residual, residual) / total) if total > 0 else 1.0
+    return {"growth": growth, "r_squared": r_squared, "points": int(x.size)}
+
+def _target_date(from_day: int, days: Optional[float]) -> Optional[str]:
+    return day_to_date(from_day + math.ceil(days)) if days is not None else None
+
+def calculate_projection(user_data: dict, today: Optional[int] = None) -> dict:
+    """Project when the user reaches their target at the planned and at their realized rate.
+
+    ``today`` is an epoch day (defaults to the current IST date); it only matters
+    for users without a start date or history.
+
+    Days to target come from solving start * (1 + r)^n = target for n, so there
+    is no per-day loop; the only O(history) work is the regression.
+    """
+    target = user_data.get("target")
+    if not target:
+        return {"error": "No target set"}
+    try:
+        start_amount = float(target["start_amount"])
+        target_amount = float(target["target_amount"])
+        rate = float(target["rate"])
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": f"Invalid target data: {e}"}
+    mode = target.get("mode", "daily")
+    if today is None:
+        today = date_to_day(datetime.now(IST).date().isoformat())
+    try:
+        start_day = date_to_day(user_data["start_date"]) if user_data.get("start_date") else today
+    except ValueError:
+        start_day = today
+
+    history = get_history(user_data)
+    current_balance = history.last_balance if history.last_balance is not None else start_amount
+    last_day = history.days[-1] if history else today
+
+    planned_growth = daily_log_growth(rate, mode) if rate > 0 else 0.0
+    planned_total = days_to_reach(start_amount, target_amount, planned_growth)
+    planned_left = days_to_reach(current_balance, target_amount, planned_growth)
+
+    result = {
+        "current_balance": current_balance,
+        "target_amount": target_amount,
+        "planned_rate": rate,
+        "planned_total_days": planned_total,
+        "planned_target_date": _target_date(start_day, planned_total),
+        "planned_days_left": planned_left,
+        "planned_finish_date": _target_date(last_day, planned_left),
+        "realized_rate": None,
+        "realized_days_left": None,
+        "realized_finish_date": None,
+        "fit_quality": None,
+        "error": None,
+    }
+
+    fit = realized_log_growth(history)
+    if fit is not None:
+        realized_left = days_to_reach(current_balance, target_amount, fit["growth"])
+        result.update({
+            "realized_rate": rate_from_log_growth(fit["growth"], mode),
+            "realized_days_left": realized_left,
+            "realized_finish_date": _target_date(last_day, realized_left),
+            "fit_quality": fit["r_squared"],
+        })
+    return result
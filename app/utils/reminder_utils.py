@@ -1,8 +1,13 @@
 # app/utils/reminder_utils.py
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from telegram.ext import Application
-from app.utils.data_utils import load_data
+from typing import Dict
+from app.utils.calculation_utils import calculate_progress_batch
+from app.utils.data_utils import (
+    async_archive_users, async_get_reminder_recipients, get_users, run_in_storage_executor
+)
 from app.config.messages import MESSAGES
+from app.config.constants import CURRENCY
 import pytz
 import telegram.error
 
@@ -18,19 +23,54 @@ def schedule_reminders(scheduler: AsyncIOScheduler, application: Application = N
         args=[application]
     )
 
+def build_reminder_texts(recipients: Dict[str, str]) -> Dict[str, str]:
+    """Return {user_id: reminder text}, with today's goal and status for each recipient.
+
+    Progress for every recipient comes from one vectorized calculate_progress_batch
+    pass instead of a calculate_progress call per user.
+    """
+    records = get_users(recipients)
+    batch = calculate_progress_batch(records)
+    progress = dict(zip(batch.user_ids, zip(
+        batch.expected_balance.tolist(), batch.current_balance.tolist(), batch.status_badge.tolist()
+    )))
+    texts = {}
+    for user_id, language in recipients.items():
+        text = MESSAGES[language]["reminder_prompt"]
+        if user_id in progress:
+            expected_balance, current_balance, status_badge = progress[user_id]
+            currency = records[user_id].get("currency", CURRENCY)
+            text += "\n\n" + MESSAGES[language]["reminder_progress"].format(
+                expected_balance=f"{currency}{expected_balance:,.2f}",
+                current_balance=f"{currency}{current_balance:,.2f}",
+                status_badge=status_badge
+            )
+        texts[user_id] = text
+    return texts
+
 async def send_reminders(application: Application) -> None:
-    """Send reminders to users with reminders enabled."""
-    data = load_data()
-    for user_id, user_data in data.get("users", {}).items():
-        if user_data.get("reminders", False) and user_data.get("target"):
-            language = user_data.get("language", "en")
-            try:
-                await application.bot.send_message(
-                    chat_id=user_id,
-                    text=MESSAGES[language]["reminder_prompt"],
-                    parse_mode="Markdown"
-                )
-            except telegram.error.Forbidden:
-                print(f"Cannot send reminder to {user_id}: Bot blocked")
-            except Exception as e:
-                print(f"Failed to send reminder to {user_id}: {e}")
+    """Send reminders to users with reminders enabled.
+
+    Users who blocked the bot are moved to cold storage afterwards.
+    """
+    recipients = await async_get_reminder_recipients()
+    texts = await run_in_storage_executor(build_reminder_texts, recipients)
+    blocked = []
+    for user_id, text in texts.items():
+        try:
+            await application.bot.send_message(
+                chat_id=user_id,
+                text=text,
+                parse_mode="Markdown"
+            )
+        except telegram.error.Forbidden:
+            print(f"Cannot send reminder to {user_id}: Bot blocked")
+            blocked.append(user_id)
+        except Exception as e:
+            print(f"Failed to send reminder to {user_id}: {e}")
+    if blocked:
+        try:
+            moved = await async_archive_users(blocked, "blocked")
+            print(f"Moved {moved} users who blocked the bot to cold storage")
+        except Exception as e:
+            print(f"Failed to archive blocked users: {e}")
@@ -0,0 +1,79 @@
+# app/utils/schema_utils.py
+import copy
+from typing import Callable, Dict, Optional
+import logging
+from app.utils.history_utils import HistoryColumns
+
+logger = logging.getLogger(__name__)
+
+# Bump this and register a migration from the previous version to change the record format
+SCHEMA_VERSION = 3
+
+DEFAULT_FIELDS = {
+    "name": "",
+    "language": "en",
+    "currency": "₹",
+    "reminders": True,
+    "history": [],
+    "history_archive": None,
+    "target": None,
+    "stoploss": None,
+    "start_date": None,
+    "awaiting": None
+}
+
+# Defaults for stored records that predate a field, where they differ from a new user's.
+# Reminders were only sent to users who had explicitly switched them on.
+LEGACY_DEFAULTS = {
+    "reminders": False
+}
+
+# from_version -> function turning a record at that version into one at from_version + 1
+MIGRATIONS: Dict[int, Callable[[dict], dict]] = {}
+
+def migration(from_version: int):
+    """Register a function that upgrades stored records from ``from_version``."""
+    def register(func: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        MIGRATIONS[from_version] = func
+        return func
+    return register
+
+@migration(0)
+def _fill_defaults(record: dict) -> dict:
+    """v0 -> v1: every field is present, so readers need no fallbacks."""
+    for key, value in {**DEFAULT_FIELDS, **LEGACY_DEFAULTS}.items():
+        record.setdefault(key, copy.deepcopy(value))
+    return record
+
+@migration(1)
+def _columnar_history(record: dict) -> dict:
+    """v1 -> v2: history is stored as packed epoch-day/balance columns."""
+    record["history"] = HistoryColumns.decode(record.get("history")).encode()
+    return record
+
+@migration(2)
+def _history_archive(record: dict) -> dict:
+    """v2 -> v3: ``history_archive`` describes days moved out of ``history`` (None: none moved)."""
+    record.setdefault("history_archive", None)
+    return record
+
+def needs_upgrade(record: Optional[dict]) -> bool:
+    """True if a stored record is missing or older than the current schema."""
+    return record is None or record.get("schema_version", 0) < SCHEMA_VERSION
+
+def upgrade_record(record: Optional[dict]) -> dict:
+    """Return a copy of a stored record migrated to SCHEMA_VERSION."""
+    record = dict(record or {})
+    version = record.get("schema_version", 0)
+    while version < SCHEMA_VERSION:
+        record = MIGRATIONS[version](record)
+        version += 1
+        record["schema_version"] = version
+    return record
+
+def new_user_record() -> dict:
+    """Return the record served for a user who has never been stored."""
+    record = copy.deepcopy(DEFAULT_FIELDS)
+    record["history"] = HistoryColumns()
+    record["schema_version"] = SCHEMA_VERSION
+    return record
@@ -0,0 +1,75 @@
+# app/utils/session_utils.py
+import functools
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from app.utils.data_utils import async_get_user_data, async_commit_user_data, get_record_version
+from app.utils.calculation_utils import calculate_progress, progress_cache
+from app.utils.history_utils import get_history
+
+logger = logging.getLogger(__name__)
+
+
+class UserSession:
+    """A user's record loaded once for an update and written back once at the end."""
+
+    def __init__(self, user_id: str, data: dict, version=None):
+        self.user_id = user_id
+        self.data = data
+        # Record version the data was read at (see data_utils.get_record_version)
+        self.version = version
+        self.changes = {}
+        self.history_entries = []
+
+    def update(self, updates: dict) -> None:
+        """Change fields on the record; they are saved when the update finishes."""
+        self.data.update(updates)
+        self.changes.update(updates)
+
+    def append_history(self, date: str, balance: float) -> None:
+        """Record a closing balance; it is logged when the update finishes."""
+        self.data["history"] = get_history(self.data).with_balance(date, balance)
+        self.history_entries.append((date, balance))
+
+    def progress(self) -> dict:
+        """Return calculate_progress for the record, reusing the result while neither it nor the day changed."""
+        if self.changes or self.history_entries:
+            # Uncommitted edits aren't reflected in the version
+            return calculate_progress(self.data)
+        return progress_cache.get(self.user_id, self.version, self.data)
+
+    async def commit(self) -> None:
+        """Persist all changes made during the update in a single storage call."""
+        if not self.changes and not self.history_entries:
+            return
+        changes, entries = self.changes, self.history_entries
+        self.changes, self.history_entries = {}, []
+        await async_commit_user_data(self.user_id, changes, entries)
+
+
+def with_user_session(callback):
+    """Wrap a PTB handler callback so it gets ``context.user_session``.
+
+    The user's record is loaded once before the callback runs and every change
+    made through the session is committed once after it returns.
+    """
+    @functools.wraps(callback)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        if user is None:
+            return await callback(update, context)
+
+        user_id = str(user.id)
+        # The version is read first so it can only be older than the data, never newer
+        version = get_record_version(user_id)
+        session = UserSession(user_id, await async_get_user_data(user_id), version)
+        context.user_session = session
+        try:
+            return await callback(update, context)
+        finally:
+            try:
+                await session.commit()
+            except Exception as e:
+                logger.error(f"Error committing user session for {user_id}: {e}")
+                raise
+    return wrapper
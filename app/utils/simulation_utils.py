@@ -0,0 +1,139 @@
+# app/utils/simulation_utils.py
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import numpy as np
+from app.config.constants import (
+    SIMULATION_DEFAULT_DAYS, SIMULATION_MAX_DAYS, SIMULATION_PATHS, SIMULATION_TIME_BUDGET, SIMULATION_WORKERS
+)
+from app.utils.history_utils import date_to_day, day_to_date, get_history
+from app.utils.projection_utils import calculate_projection
+
+logger = logging.getLogger(__name__)
+
+# Daily returns needed before the spread of outcomes means anything
+MIN_RETURNS = 5
+PERCENTILES = (5, 25, 50, 75, 95)
+# Paths x days drawn per chunk; bounds memory (about 16 MB) and how far past the budget a run can go
+CHUNK_ELEMENTS = 1_000_000
+
+# Simulations get their own threads so a burst of /simulate can't starve storage reads and commits
+_executor = ThreadPoolExecutor(max_workers=SIMULATION_WORKERS, thread_name_prefix="simulation")
+
+def estimate_daily_returns(history) -> Optional[dict]:
+    """Estimate the distribution of daily log returns from consecutive closes.
+
+    A close after a gap of g days counts as g daily steps: the drift is the total
+    log growth over the total days, and each step's residual is scaled by 1/sqrt(g)
+    so gaps (weekends, missed days) don't inflate the volatility. Returns
+    {"drift", "volatility", "residuals", "count"} or None with too few returns.
+    """
+    days = np.frombuffer(history.days, dtype=np.int32).astype(np.float64)
+    balances = np.frombuffer(history.balances, dtype=np.float64)
+    positive = balances > 0
+    days, balances = days[positive], balances[positive]
+    if days.size <= MIN_RETURNS:
+        return None
+    gaps = np.diff(days)
+    log_returns = np.diff(np.log(balances))
+    drift = float(log_returns.sum() / gaps.sum())
+    residuals = (log_returns - drift * gaps) / np.sqrt(gaps)
+    return {
+        "drift": drift,
+        "volatility": float(residuals.std(ddof=1)),
+        "residuals": residuals,
+        "count": int(residuals.size),
+    }
+
+def simulate_paths(current_balance: float, target_amount: float, returns: dict, horizon_days: int,
+                   paths: int = SIMULATION_PATHS, time_budget: float = SIMULATION_TIME_BUDGET,
+                   seed: Optional[int] = None) -> dict:
+    """Bootstrap daily returns into balance paths and summarise where they end.
+
+    Each day's log return is the drift plus a residual resampled from the history,
+    so fat tails in the user's own results carry over. Paths are generated a chunk
+    (a 2-D array of paths x days) at a time and the run stops early once another
+    chunk would overrun ``time_budget`` seconds. Returns the number of paths run,
+    the final balance at each of PERCENTILES, and the share of paths that reached
+    the target on any day up to the horizon.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    residuals = returns["residuals"]
+    log_target = math.log(target_amount / current_balance)
+    chunk_size = max(1, min(paths, CHUNK_ELEMENTS // horizon_days))
+
+    finals = []
+    hits = 0
+    done = 0
+    chunk_seconds = 0.0
+    while done < paths:
+        elapsed = time.perf_counter() - started
+        if done and elapsed + chunk_seconds > time_budget:
+            break
+        count = min(chunk_size, paths - done)
+        chunk_started = time.perf_counter()
+        steps = residuals[rng.integers(0, residuals.size, size=(count, horizon_days))]
+        steps += returns["drift"]
+        np.cumsum(steps, axis=1, out=steps)
+        hits += int(np.count_nonzero(steps.max(axis=1) >= log_target))
+        finals.append(steps[:, -1].copy())
+        done += count
+        chunk_seconds = time.perf_counter() - chunk_started
+
+    final_balances = current_balance * np.exp(np.concatenate(finals))
+    elapsed = time.perf_counter() - started
+    logger.debug(f"Simulated {done} paths over {horizon_days} days in {elapsed * 1000:.0f} ms")
+    return {
+        "paths": done,
+        "hit_probability": hits / done,
+        "percentiles": dict(zip(PERCENTILES, np.percentile(final_balances, PERCENTILES).tolist())),
+        "truncated": done < paths,
+        "elapsed": elapsed,
+    }
+
+def run_simulation(user_data: dict, today: Optional[int] = None, paths: int = SIMULATION_PATHS,
+                   time_budget: float = SIMULATION_TIME_BUDGET, seed: Optional[int] = None) -> dict:
+    """Simulate a user's balance from their last close to their planned target date.
+
+    Falls back to SIMULATION_DEFAULT_DAYS ahead when the plan has no reachable date
+    (including one beyond PROJECTION_MAX_DAYS) or the date has already passed, and
+    never looks further than SIMULATION_MAX_DAYS. CPU-bound for up to ``time_budget`` seconds, so
+    handlers use async_run_simulation.
+    """
+    projection = calculate_projection(user_data, today)
+    if projection.get("error"):
+        return {"error": projection["error"]}
+    history = get_history(user_data)
+    returns = estimate_daily_returns(history)
+    result = {
+        "current_balance": projection["current_balance"],
+        "target_amount": projection["target_amount"],
+        "returns": None if returns is None else {key: returns[key] for key in ("drift", "volatility", "count")},
+        "error": None,
+    }
+    if returns is None or not 0 < projection["current_balance"] < projection["target_amount"]:
+        return result
+
+    last_day = history.days[-1]
+    horizon_days = 0
+    if projection["planned_target_date"]:
+        horizon_days = date_to_day(projection["planned_target_date"]) - last_day
+    if horizon_days <= 0:
+        horizon_days = SIMULATION_DEFAULT_DAYS
+    horizon_days = min(horizon_days, SIMULATION_MAX_DAYS)
+
+    result.update(simulate_paths(
+        projection["current_balance"], projection["target_amount"], returns, horizon_days,
+        paths=paths, time_budget=time_budget, seed=seed
+    ))
+    result.update({"horizon_days": horizon_days, "horizon_date": day_to_date(last_day + horizon_days)})
+    return result
+
+async def async_run_simulation(user_data: dict) -> dict:
+    """Run run_simulation on the simulation thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, run_simulation, user_data)
@@ -0,0 +1,1110 @@
+# app/utils/storage_backends.py
+import copy
+import json
+import os
+import shutil
+import sqlite3
+import time
+import zlib
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+from app.config.constants import EVENT_RETENTION_DAYS, EVENT_SNAPSHOT_EVENTS
+from app.utils.codec_utils import Codec, dumps, get_codec, is_binary, iter_object_items, loads
+from app.utils.history_utils import HistoryColumns
+from app.utils.lock_utils import ProcessLock, VersionCounter
+
+logger = logging.getLogger(__name__)
+
+def _ensure_parent_directory(path: str) -> None:
+    data_dir = os.path.dirname(path)
+    if data_dir and not os.path.exists(data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+
+class StoreCorruptedError(Exception):
+    """Raised instead of treating an unreadable store as empty, so a later save can't wipe it."""
+
+
+def reminder_eligible(record: dict) -> bool:
+    """True if the user has reminders switched on and an active target."""
+    return bool(record.get("reminders", False) and record.get("target"))
+
+def _fsync_directory(path: str) -> None:
+    """Make a rename inside ``path``'s directory survive a crash."""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:  # Directories can't be opened on some platforms
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _stat_fingerprint(path: str) -> Optional[list]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+def _atomic_write(path: str, payload: bytes, fsync: bool = False) -> None:
+    """Write bytes to a temporary file and move it into place.
+
+    With ``fsync`` the data and the rename are flushed to disk before returning.
+    """
+    _ensure_parent_directory(path)
+    temp_file = f"{path}.tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_file, path)
+        if fsync:
+            _fsync_directory(path)
+    except Exception:
+        # Clean up temp file if it exists
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+class StorageBackend:
+    """Base interface for user data storage engines."""
+
+    name = "base"
+
+    def load_all(self) -> dict:
+        """Return the whole store as {"users": {user_id: record}}."""
+        raise NotImplementedError
+
+    def save_all(self, data: dict) -> None:
+        """Replace the whole store with the given {"users": {...}} mapping."""
+        raise NotImplementedError
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        """Return a single user record, or None if the user is unknown."""
+        return self.load_all().get("users", {}).get(user_id)
+
+    def update_user(self, user_id: str, updates: dict) -> None:
+        """Merge the given fields into a single user record."""
+        self.update_users({user_id: updates})
+
+    def update_users(self, changes: Dict[str, dict]) -> None:
+        """Merge field updates into several user records at once."""
+        raise NotImplementedError
+
+    def modify_users(self, user_ids: Iterable[str], modify: Callable[[str, Optional[dict]], Optional[dict]]) -> Dict[str, dict]:
+        """Atomically read, change and write several users.
+
+        ``modify(user_id, record)`` gets the current stored record (or None) and
+        returns the fields to merge into it, or None to leave it alone. No other
+        thread or process can write those users in between. Returns the applied
+        updates by user id.
+        """
+        raise NotImplementedError
+
+    def delete_users(self, records: Dict[str, dict]) -> List[str]:
+        """Delete users whose stored record still equals the one given for them.
+
+        A user written since ``records`` was read is kept. Returns the deleted ids.
+        """
+        raise NotImplementedError
+
+    def is_stale(self) -> bool:
+        """True if another process has written to the store since this instance last loaded it."""
+        return False
+
+    def fingerprint(self) -> Optional[list]:
+        """Cheap token that changes whenever the stored data changes, or None if unsupported.
+
+        Used to check a saved copy of the store is still current without reading it.
+        """
+        return None
+
+    def assume_loaded(self) -> None:
+        """Treat the current stored state as loaded (after restoring it from elsewhere)."""
+
+    def verify(self) -> dict:
+        """Check every stored record can be read.
+
+        Returns {"records": count, "errors": [messages]}.
+        """
+        records = 0
+        errors = []
+        try:
+            for user_id, record in self.iter_users():
+                if not isinstance(record, dict):
+                    errors.append(f"user {user_id}: record is not an object")
+                records += 1
+        except Exception as e:
+            errors.append(str(e))
+        return {"records": records, "errors": errors}
+
+    def iter_users(self) -> Iterator[Tuple[str, dict]]:
+        """Yield (user_id, record) pairs for every stored user."""
+        yield from self.load_all().get("users", {}).items()
+
+    def reminder_recipients(self) -> Dict[str, str]:
+        """Return {user_id: language} for every user due a daily reminder."""
+        return {
+            user_id: record.get("language", "en")
+            for user_id, record in self.iter_users()
+            if reminder_eligible(record)
+        }
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class JsonFileBackend(StorageBackend):
+    """Single file holding every user (the original storage layout).
+
+    The file is written with the configured codec and read with whichever codec
+    its header names, so switching codecs needs no separate migration step.
+    """
+
+    name = "json"
+
+    def __init__(self, path: str, codec: Codec = None, durable: bool = False):
+        self.path = path
+        self.codec = codec or get_codec("json-pretty")
+        self.durable = durable
+        self.lock = Lock()
+        # Writers in any process serialize on the lock file and bump the version file
+        self.process_lock = ProcessLock(f"{path}.lock")
+        self.versions = VersionCounter(f"{path}.version")
+
+    def _read(self) -> dict:
+        _ensure_parent_directory(self.path)
+        if not os.path.exists(self.path):
+            logger.info(f"Data file {self.path} not found, creating new one")
+            return {"users": {}}
+
+        try:
+            with open(self.path, "rb") as f:
+                data = loads(f.read())
+            if "users" not in data:
+                data = self._upgrade_layout()
+            return data
+        except ValueError as e:
+            logger.error(f"Decode error in {self.path}: {e}")
+            # Keep a copy and refuse to continue: carrying on with an empty store would overwrite it
+            backup_file = f"{self.path}.backup"
+            shutil.copy2(self.path, backup_file)
+            logger.info(f"Corrupted file backed up to {backup_file}")
+            raise StoreCorruptedError(
+                f"{self.path} can't be decoded (copy saved to {backup_file}); run `python -m app.cli verify`"
+            ) from e
+        except Exception as e:
+            logger.error(f"Error loading data from {self.path}: {e}")
+            raise
+
+    def _upgrade_layout(self) -> dict:
+        """Rewrap a legacy file that lacks the top-level "users" key, once and on disk."""
+        with self.process_lock.hold():
+            with open(self.path, "rb") as f:
+                data = loads(f.read())
+            if "users" not in data:
+                data = {"users": data} if data else {"users": {}}
+                self._write(data)
+                self.versions.bump()
+                logger.info(f"Upgraded {self.path} to the current store layout")
+        return data
+
+    def _write(self, data: dict) -> None:
+        try:
+            _atomic_write(self.path, dumps(data, self.codec), fsync=self.durable)
+        except Exception as e:
+            logger.error(f"Error saving data to {self.path}: {e}")
+            raise
+
+    def load_all(self) -> dict:
+        with self.lock:
+            version = self.versions.read()
+            data = self._read()
+            self.versions.mark_loaded(version)
+            return data
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        # Unlike load_all this doesn't mark the store as loaded: callers holding
+        # data built from the whole store must still see other workers' writes as stale
+        with self.lock:
+            return self._read()["users"].get(user_id)
+
+    def save_all(self, data: dict) -> None:
+        with self.lock, self.process_lock.hold():
+            self._write(data)
+            self.versions.bump()
+
+    def update_users(self, changes: Dict[str, dict]) -> None:
+        with self.lock, self.process_lock.hold():
+            data = self._read()
+            users = data.setdefault("users", {})
+            for user_id, updates in changes.items():
+                users.setdefault(user_id, {}).update(updates)
+            self._write(data)
+            self.versions.bump()
+
+    def modify_users(self, user_ids, modify) -> Dict[str, dict]:
+        with self.lock, self.process_lock.hold():
+            data = self._read()
+            users = data.setdefault("users", {})
+            applied = {}
+            for user_id in user_ids:
+                updates = modify(user_id, users.get(user_id))
+                if updates:
+                    users.setdefault(user_id, {}).update(updates)
+                    applied[user_id] = updates
+            if applied:
+                self._write(data)
+                self.versions.bump()
+            return applied
+
+    def delete_users(self, records: Dict[str, dict]) -> List[str]:
+        with self.lock, self.process_lock.hold():
+            data = self._read()
+            users = data.setdefault("users", {})
+            deleted = [user_id for user_id, record in records.items() if user_id in users and users[user_id] == record]
+            if deleted:
+                for user_id in deleted:
+                    del users[user_id]
+                self._write(data)
+                self.versions.bump()
+            return deleted
+
+    def is_stale(self) -> bool:
+        return self.versions.is_stale()
+
+    def fingerprint(self) -> Optional[list]:
+        return [self.versions.read(), _stat_fingerprint(self.path)]
+
+    def assume_loaded(self) -> None:
+        self.versions.mark_loaded(self.versions.read())
+
+    def iter_users(self) -> Iterator[Tuple[str, dict]]:
+        """Stream users one at a time instead of decoding the whole file."""
+        if not os.path.exists(self.path):
+            return
+        # The open handle keeps reading the same file even if a writer replaces it meanwhile
+        with open(self.path, "rb") as f:
+            if is_binary(f):
+                yield from self.load_all()["users"].items()
+                return
+            try:
+                yield from iter_object_items(f, "users")
+            except KeyError:
+                # Legacy layout: the full load rewrites it once, later scans stream
+                yield from self.load_all()["users"].items()
+            except ValueError as e:
+                raise StoreCorruptedError(f"{self.path} can't be decoded: {e}") from e
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite store: one row per user plus one row per history entry.
+
+    The ``users`` table keeps every field except ``history`` as a JSON blob;
+    ``history`` lives in its own table keyed by (user_id, date), so updating a
+    single user only touches that user's rows. History is returned in the same
+    packed columnar form the other backends store.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, busy_timeout: float = 30.0, durable: bool = False):
+        self.path = path
+        self.lock = Lock()
+        _ensure_parent_directory(path)
+        # Writers in other processes are waited for (up to busy_timeout) rather than failing
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # FULL syncs the WAL on every commit; NORMAL may drop the last commits on power loss
+        self.conn.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+        self.loaded_version = None
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                user_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                balance REAL NOT NULL,
+                PRIMARY KEY (user_id, date)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _history(self, user_id: str) -> dict:
+        rows = self.conn.execute(
+            "SELECT date, balance FROM history WHERE user_id = ? ORDER BY date",
+            (user_id,)
+        )
+        return HistoryColumns.from_entries({"date": date, "balance": balance} for date, balance in rows).encode()
+
+    def _get(self, user_id: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row[0])
+        record["history"] = self._history(user_id)
+        return record
+
+    def _put(self, user_id: str, record: dict) -> None:
+        fields = {key: value for key, value in record.items() if key != "history"}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(fields, ensure_ascii=False, separators=(",", ":")))
+        )
+        if "history" in record:
+            self._replace_history(user_id, record["history"])
+
+    def _replace_history(self, user_id: str, history) -> None:
+        history = HistoryColumns.decode(history)
+        self.conn.execute("DELETE FROM history WHERE user_id = ?", (user_id,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO history (user_id, date, balance) VALUES (?, ?, ?)",
+            [(user_id, date, balance) for date, balance in zip(history.dates(), history.balances)]
+        )
+
+    def _bump_generation(self) -> None:
+        # Persistent write counter for fingerprint(); runs inside each write transaction
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def _data_version(self) -> int:
+        # Changes whenever another connection commits; our own commits leave it alone
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _merge(self, user_id: str, updates: dict) -> None:
+        row = self.conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        fields = json.loads(row[0]) if row else {}
+        fields.update({key: value for key, value in updates.items() if key != "history"})
+        self.conn.execute(
+            "INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(fields, ensure_ascii=False, separators=(",", ":")))
+        )
+        if "history" in updates:
+            self._replace_history(user_id, updates["history"])
+
+    def load_all(self) -> dict:
+        with self.lock:
+            # Read everything in one transaction so the snapshot is consistent
+            self.conn.execute("BEGIN")
+            try:
+                self.loaded_version = self._data_version()
+                user_ids = [row[0] for row in self.conn.execute("SELECT user_id FROM users ORDER BY user_id")]
+                users = {user_id: self._get(user_id) for user_id in user_ids}
+            finally:
+                self.conn.execute("COMMIT")
+        return {"users": users}
+
+    def save_all(self, data: dict) -> None:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM users")
+                self.conn.execute("DELETE FROM history")
+                for user_id, record in data.get("users", {}).items():
+                    self._put(user_id, record)
+                self._bump_generation()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        with self.lock:
+            return self._get(user_id)
+
+    def update_users(self, changes: Dict[str, dict]) -> None:
+        with self.lock:
+            # IMMEDIATE takes the write lock up front so concurrent writers queue instead of deadlocking
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for user_id, updates in changes.items():
+                    self._merge(user_id, updates)
+                self._bump_generation()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def modify_users(self, user_ids, modify) -> Dict[str, dict]:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                applied = {}
+                for user_id in user_ids:
+                    updates = modify(user_id, self._get(user_id))
+                    if updates:
+                        self._merge(user_id, updates)
+                        applied[user_id] = updates
+                if applied:
+                    self._bump_generation()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return applied
+
+    def delete_users(self, records: Dict[str, dict]) -> List[str]:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = [user_id for user_id, record in records.items() if self._get(user_id) == record]
+                for user_id in deleted:
+                    self.conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+                    self.conn.execute("DELETE FROM history WHERE user_id = ?", (user_id,))
+                if deleted:
+                    self._bump_generation()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return deleted
+
+    def is_stale(self) -> bool:
+        with self.lock:
+            return self.loaded_version is None or self._data_version() != self.loaded_version
+
+    def fingerprint(self) -> Optional[list]:
+        # File stats change on every checkpoint, so count writes in the database instead
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return [row[0] if row else 0]
+
+    def assume_loaded(self) -> None:
+        with self.lock:
+            self.loaded_version = self._data_version()
+
+    def verify(self) -> dict:
+        with self.lock:
+            errors = [row[0] for row in self.conn.execute("PRAGMA integrity_check") if row[0] != "ok"]
+            records = 0
+            for user_id, data in self.conn.execute("SELECT user_id, data FROM users"):
+                records += 1
+                try:
+                    json.loads(data)
+                except ValueError as e:
+                    errors.append(f"user {user_id}: {e}")
+        return {"records": records, "errors": errors}
+
+    def iter_users(self) -> Iterator[Tuple[str, dict]]:
+        with self.lock:
+            user_ids = [row[0] for row in self.conn.execute("SELECT user_id FROM users ORDER BY user_id")]
+        for user_id in user_ids:
+            record = self.get_user(user_id)
+            if record is not None:
+                yield user_id, record
+
+    def reminder_recipients(self) -> Dict[str, str]:
+        # Only the users table is read; history rows are never touched
+        with self.lock:
+            rows = self.conn.execute("SELECT user_id, data FROM users").fetchall()
+        recipients = {}
+        for user_id, data in rows:
+            fields = json.loads(data)
+            if reminder_eligible(fields):
+                recipients[user_id] = fields.get("language", "en")
+        return recipients
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+class ShardedJsonBackend(StorageBackend):
+    """Users spread over hash-bucket JSON files with a small index of ids and flags.
+
+    Layout under ``path``::
+
+        index.json          {"shards": N, "users": {user_id: {"reminders", "target", "language"}}}
+        shards/0a3.json     {"users": {...}} for every user hashed into bucket 0x0a3
+
+    Reading or writing a user only touches that user's shard, and each shard has
+    its own lock file so updates to different buckets never wait on each other,
+    in this process or any other.
+    """
+
+    name = "sharded"
+    shard_dir = "shards"
+    shard_extension = "json"
+
+    def __init__(self, path: str, codec: Codec = None, shard_count: int = 256, durable: bool = False):
+        self.path = path
+        self.codec = codec or get_codec("json")
+        self.durable = durable
+        self.index_path = os.path.join(path, "index.json")
+        self.index_lock = ProcessLock(os.path.join(path, "index.lock"))
+        self.versions = VersionCounter(os.path.join(path, "version"))
+        os.makedirs(os.path.join(path, self.shard_dir), exist_ok=True)
+        self.index = self._read_index(shard_count)
+        self.shard_count = self.index["shards"]
+        self.shard_locks = [ProcessLock(f"{self._shard_path(shard)}.lock") for shard in range(self.shard_count)]
+
+    def _read_index(self, shard_count: int) -> dict:
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            index.setdefault("users", {})
+            return index
+        return {"shards": shard_count, "users": {}}
+
+    def _write_index(self) -> None:
+        _atomic_write(self.index_path, json.dumps(self.index, separators=(",", ":")).encode("utf-8"), fsync=self.durable)
+
+    @staticmethod
+    def user_flags(record: dict) -> dict:
+        """Summarize the fields other components look up without reading the shard."""
+        return {
+            "reminders": bool(record.get("reminders", False)),
+            "target": bool(record.get("target")),
+            "language": record.get("language", "en"),
+        }
+
+    def shard_for(self, user_id: str) -> int:
+        return zlib.crc32(user_id.encode("utf-8")) % self.shard_count
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.path, self.shard_dir, f"{shard:03x}.{self.shard_extension}")
+
+    def _read_shard(self, shard: int) -> dict:
+        # Shards are replaced atomically, so readers never need the lock
+        path = self._shard_path(shard)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "rb") as f:
+                return loads(f.read()).get("users", {})
+        except ValueError as e:
+            logger.error(f"Decode error in shard {path}: {e}")
+            backup_file = f"{path}.backup"
+            shutil.copy2(path, backup_file)
+            logger.info(f"Corrupted shard backed up to {backup_file}")
+            raise StoreCorruptedError(
+                f"Shard {path} can't be decoded (copy saved to {backup_file}); run `python -m app.cli verify`"
+            ) from e
+
+    def _write_shard(self, shard: int, users: dict) -> None:
+        _atomic_write(self._shard_path(shard), dumps({"users": users}, self.codec), fsync=self.durable)
+
+    def _set_flags(self, flags: Dict[str, dict], replace: bool = False, removed: Iterable[str] = ()) -> None:
+        """Record index flags, drop ``removed`` users from the index and bump the store version."""
+        with self.index_lock.hold():
+            # Another process may have changed the index since we last read it
+            self.index = self._read_index(self.shard_count)
+            users = self.index["users"]
+            if replace:
+                self.index["users"] = flags
+                self._write_index()
+            elif any(users.get(user_id) != value for user_id, value in flags.items()) or any(user_id in users for user_id in removed):
+                users.update(flags)
+                for user_id in removed:
+                    users.pop(user_id, None)
+                self._write_index()
+            self.versions.bump()
+
+    def _refresh_index(self) -> dict:
+        with self.index_lock.hold():
+            self.index = self._read_index(self.shard_count)
+            return self.index
+
+    def user_ids(self) -> list:
+        """Return every known user id from the index."""
+        return list(self._refresh_index()["users"])
+
+    def reminder_recipients(self) -> Dict[str, str]:
+        # Answered from the index alone, without opening any shard
+        return {
+            user_id: flags.get("language", "en")
+            for user_id, flags in self._refresh_index()["users"].items()
+            if flags.get("reminders") and flags.get("target")
+        }
+
+    def load_all(self) -> dict:
+        version = self.versions.read()
+        data = {"users": dict(self.iter_users())}
+        self.versions.mark_loaded(version)
+        return data
+
+    def save_all(self, data: dict) -> None:
+        buckets = [{} for _ in range(self.shard_count)]
+        for user_id, record in data.get("users", {}).items():
+            buckets[self.shard_for(user_id)][user_id] = record
+        for shard, users in enumerate(buckets):
+            with self.shard_locks[shard].hold():
+                if users or os.path.exists(self._shard_path(shard)):
+                    self._write_shard(shard, users)
+        flags = {user_id: self.user_flags(record) for user_id, record in data.get("users", {}).items()}
+        self._set_flags(flags, replace=True)
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        return self._read_shard(self.shard_for(user_id)).get(user_id)
+
+    def update_users(self, changes: Dict[str, dict]) -> None:
+        self.modify_users(changes, lambda user_id, record: changes[user_id])
+
+    def modify_users(self, user_ids, modify) -> Dict[str, dict]:
+        by_shard = {}
+        for user_id in user_ids:
+            by_shard.setdefault(self.shard_for(user_id), []).append(user_id)
+
+        applied = {}
+        flags = {}
+        for shard, shard_user_ids in by_shard.items():
+            with self.shard_locks[shard].hold():
+                users = self._read_shard(shard)
+                changed = False
+                for user_id in shard_user_ids:
+                    updates = modify(user_id, users.get(user_id))
+                    if not updates:
+                        continue
+                    record = users.setdefault(user_id, {})
+                    record.update(updates)
+                    flags[user_id] = self.user_flags(record)
+                    applied[user_id] = updates
+                    changed = True
+                if changed:
+                    self._write_shard(shard, users)
+        if applied:
+            self._set_flags(flags)
+        return applied
+
+    def delete_users(self, records: Dict[str, dict]) -> List[str]:
+        by_shard = {}
+        for user_id in records:
+            by_shard.setdefault(self.shard_for(user_id), []).append(user_id)
+
+        deleted = []
+        for shard, shard_user_ids in by_shard.items():
+            with self.shard_locks[shard].hold():
+                users = self._read_shard(shard)
+                removed = [user_id for user_id in shard_user_ids if user_id in users and users[user_id] == records[user_id]]
+                if removed:
+                    for user_id in removed:
+                        del users[user_id]
+                    self._write_shard(shard, users)
+                    deleted.extend(removed)
+        if deleted:
+            self._set_flags({}, removed=deleted)
+        return deleted
+
+    def is_stale(self) -> bool:
+        return self.versions.is_stale()
+
+    def fingerprint(self) -> Optional[list]:
+        # Every shard write bumps the version after it lands
+        return [self.versions.read(), _stat_fingerprint(self.index_path)]
+
+    def assume_loaded(self) -> None:
+        self.versions.mark_loaded(self.versions.read())
+
+    def iter_users(self) -> Iterator[Tuple[str, dict]]:
+        for shard in range(self.shard_count):
+            yield from self._read_shard(shard).items()
+
+
+class SegmentBackend(ShardedJsonBackend):
+    """Sharded layout where every record is its own checksummed line.
+
+    Each segment file holds one line per user::
+
+        <crc32 of payload, 8 hex digits> <payload: JSON [user_id, record]>
+
+    A damaged line costs only that record: it is skipped on read, and the raw
+    bytes are appended to ``<segment>.corrupt`` before the segment is next
+    rewritten, so nothing is thrown away silently. Segments are read line by
+    line, so ``verify`` never holds more than one line in memory.
+    """
+
+    name = "segment"
+    shard_dir = "segments"
+    shard_extension = "seg"
+
+    def __init__(self, path: str, codec: Codec = None, shard_count: int = 64, durable: bool = False):
+        # Lines must stay text, so records are always JSON whatever codec is configured
+        super().__init__(path, codec=None, shard_count=shard_count, durable=durable)
+        self.damaged = {}
+
+    @staticmethod
+    def encode_line(user_id: str, record: dict) -> bytes:
+        payload = json.dumps([user_id, record], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+    @staticmethod
+    def decode_line(line: bytes) -> Tuple[str, dict]:
+        """Return (user_id, record) from a segment line, or raise ValueError if it is damaged."""
+        if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+            raise ValueError("truncated or malformed line")
+        payload = line[9:-1]
+        if int(line[:8], 16) != zlib.crc32(payload):
+            raise ValueError("checksum mismatch")
+        user_id, record = json.loads(payload)
+        return user_id, record
+
+    def _scan(self, shard: int) -> Iterator[Tuple[int, bytes, Optional[Tuple[str, dict]], Optional[str]]]:
+        """Yield (line number, raw line, decoded entry or None, error or None) for a segment."""
+        path = self._shard_path(shard)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            for number, line in enumerate(f, start=1):
+                try:
+                    yield number, line, self.decode_line(line), None
+                except ValueError as e:
+                    yield number, line, None, str(e)
+
+    def _read_shard(self, shard: int) -> dict:
+        users = {}
+        damaged = []
+        for number, line, entry, error in self._scan(shard):
+            if entry is None:
+                logger.error(f"Skipping damaged record at {self._shard_path(shard)}:{number}: {error}")
+                damaged.append(line)
+            else:
+                users[entry[0]] = entry[1]
+        if damaged:
+            self.damaged[shard] = damaged
+        return users
+
+    def _write_shard(self, shard: int, users: dict) -> None:
+        damaged = self.damaged.pop(shard, None)
+        if damaged:
+            # Keep the unreadable bytes for manual recovery before they are overwritten
+            with open(f"{self._shard_path(shard)}.corrupt", "ab") as f:
+                f.writelines(damaged)
+        payload = b"".join(self.encode_line(user_id, record) for user_id, record in users.items())
+        _atomic_write(self._shard_path(shard), payload, fsync=self.durable)
+
+    def verify(self) -> dict:
+        records = 0
+        errors = []
+        seen = set()
+        for shard in range(self.shard_count):
+            for number, _, entry, error in self._scan(shard):
+                if entry is None:
+                    errors.append(f"{self._shard_path(shard)}:{number}: {error}")
+                    continue
+                records += 1
+                seen.add(entry[0])
+                if self.shard_for(entry[0]) != shard:
+                    errors.append(f"{self._shard_path(shard)}:{number}: user {entry[0]} is in the wrong segment")
+        missing = set(self._refresh_index()["users"]) - seen
+        if missing:
+            errors.append(f"{len(missing)} indexed users have no readable record")
+        return {"records": records, "errors": errors}
+
+
+class EventLogBackend(StorageBackend):
+    """Event-sourced store: numbered snapshots plus the mutations made after each.
+
+    Layout under ``path``::
+
+        snapshot-00000003-<ms>.json   {"segment": 3, "t": <unix time>, "users": {...}}
+        segment-00000003.log          one {"t", "u", "f": fields} JSON line per mutation since snapshot 3
+                                      ("f": null deletes the user)
+
+    A snapshot's time (also in its file name, in milliseconds) is that of the
+    last mutation it includes.
+
+    Opening the store loads the newest snapshot and replays its segment. Once a
+    segment holds ``snapshot_events`` mutations the state is written out as the
+    next snapshot and a fresh segment is started. Older snapshots and segments
+    are kept for ``retention_days``, so ``state_at`` can rebuild the store as it
+    was at any moment in that window. Other processes' appends are picked up by
+    re-reading the segment tail under the shared lock before every write.
+    """
+
+    name = "eventlog"
+
+    def __init__(self, path: str, codec: Codec = None, durable: bool = False,
+                 snapshot_events: int = EVENT_SNAPSHOT_EVENTS, retention_days: float = EVENT_RETENTION_DAYS):
+        self.path = path
+        self.codec = codec or get_codec("json")
+        self.durable = durable
+        self.snapshot_events = snapshot_events
+        self.retention_days = retention_days
+        self.lock = ProcessLock(os.path.join(path, "events.lock"))
+        self.versions = VersionCounter(os.path.join(path, "version"))
+        os.makedirs(path, exist_ok=True)
+        self.users = {}
+        self.segment = None
+        self.offset = 0
+        self.segment_events = 0
+        self.last_event_time = 0.0
+        with self.lock.hold():
+            self._refresh()
+
+    def _snapshot_path(self, segment: int, timestamp: float) -> str:
+        return os.path.join(self.path, f"snapshot-{segment:08d}-{int(timestamp * 1000):013d}.json")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment-{segment:08d}.log")
+
+    def snapshots(self) -> List[Tuple[int, float]]:
+        """Return (segment, time) for every snapshot on disk, oldest first."""
+        found = []
+        for name in os.listdir(self.path):
+            if name.startswith("snapshot-") and name.endswith(".json"):
+                segment, millis = name[len("snapshot-"):-len(".json")].split("-")
+                found.append((int(segment), int(millis) / 1000))
+        return sorted(found)
+
+    def _read_snapshot(self, segment: int, timestamp: float) -> dict:
+        with open(self._snapshot_path(segment, timestamp), "rb") as f:
+            return loads(f.read())
+
+    def _write_snapshot(self, segment: int, users: dict, timestamp: float) -> None:
+        payload = dumps({"segment": segment, "t": timestamp, "users": users}, self.codec)
+        _atomic_write(self._snapshot_path(segment, timestamp), payload, fsync=self.durable)
+
+    @staticmethod
+    def _apply(users: dict, event: dict) -> None:
+        if event["f"] is None:
+            users.pop(event["u"], None)
+            return
+        # Records are replaced, never changed in place, so handed-out copies stay valid
+        users[event["u"]] = {**users.get(event["u"], {}), **event["f"]}
+
+    def _read_events(self, segment: int, offset: int = 0) -> Tuple[list, int]:
+        """Return complete events in a segment from ``offset`` and where they end."""
+        path = self._segment_path(segment)
+        events = []
+        if not os.path.exists(path):
+            return events, offset
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    logger.warning(f"Ignoring incomplete trailing event in {path}")
+                    break
+                try:
+                    events.append(json.loads(raw))
+                except ValueError as e:
+                    logger.error(f"Skipping corrupt event in {path}: {e}")
+                offset += len(raw)
+        return events, offset
+
+    def _refresh(self) -> None:
+        """Catch up with snapshots and events written since we last looked (lock held)."""
+        snapshots = self.snapshots()
+        if not snapshots:
+            # Brand new store: an empty snapshot 0 is the base every replay starts from
+            self._write_snapshot(0, {}, 0.0)
+            snapshots = [(0, 0.0)]
+        latest, timestamp = snapshots[-1]
+        if latest != self.segment:
+            self.users = self._read_snapshot(latest, timestamp).get("users", {})
+            self.segment, self.offset, self.segment_events = latest, 0, 0
+            self.last_event_time = timestamp
+        events, offset = self._read_events(self.segment, self.offset)
+        segment_path = self._segment_path(self.segment)
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > offset:
+            # A writer died mid-line; nobody else can be appending while we hold the lock
+            with open(segment_path, "r+b") as f:
+                f.truncate(offset)
+        for event in events:
+            self._apply(self.users, event)
+            self.last_event_time = max(self.last_event_time, event.get("t", 0.0))
+        self.offset = offset
+        self.segment_events += len(events)
+
+    def _append(self, events: list) -> None:
+        """Apply and durably log mutations (lock held, state refreshed)."""
+        lines = "".join(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events)
+        payload = lines.encode("utf-8")
+        with open(self._segment_path(self.segment), "ab") as f:
+            f.write(payload)
+            if self.durable:
+                f.flush()
+                os.fsync(f.fileno())
+        for event in events:
+            self._apply(self.users, event)
+            self.last_event_time = max(self.last_event_time, event["t"])
+        self.offset += len(payload)
+        self.segment_events += len(events)
+        self.versions.bump()
+        if self.segment_events >= self.snapshot_events:
+            self._start_segment(self.users, self.last_event_time)
+
+    def _start_segment(self, users: dict, timestamp: float) -> None:
+        """Write ``users`` as the next snapshot and switch to its empty segment (lock held)."""
+        segment = self.segment + 1
+        self._write_snapshot(segment, users, timestamp)
+        self.users = users
+        self.segment, self.offset, self.segment_events = segment, 0, 0
+        self.last_event_time = timestamp
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop snapshots and segments that fall entirely outside the retention window."""
+        cutoff = time.time() - self.retention_days * 86400
+        snapshots = self.snapshots()
+        # Keep the newest snapshot older than the cutoff: restores inside the window start from it
+        keep_from = snapshots[0][0]
+        for segment, timestamp in snapshots[:-1]:
+            if timestamp <= cutoff:
+                keep_from = segment
+        for segment, timestamp in snapshots:
+            if segment >= keep_from:
+                break
+            for path in (self._snapshot_path(segment, timestamp), self._segment_path(segment)):
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"Pruned event log snapshot {segment} from {self.path}")
+
+    def compact(self) -> None:
+        """Write the current state as a new snapshot now."""
+        with self.lock.hold():
+            self._refresh()
+            if self.segment_events:
+                self._start_segment(self.users, self.last_event_time)
+
+    def load_all(self) -> dict:
+        with self.lock.hold():
+            self._refresh()
+            self.versions.mark_loaded(self.versions.read())
+            return {"users": {user_id: dict(record) for user_id, record in self.users.items()}}
+
+    def save_all(self, data: dict) -> None:
+        with self.lock.hold():
+            self._refresh()
+            self._start_segment(dict(data.get("users", {})), time.time())
+            self.versions.bump()
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        with self.lock.hold():
+            self._refresh()
+            record = self.users.get(user_id)
+            return dict(record) if record is not None else None
+
+    def update_users(self, changes: Dict[str, dict]) -> None:
+        self.modify_users(changes, lambda user_id, record: changes[user_id])
+
+    def modify_users(self, user_ids, modify) -> Dict[str, dict]:
+        with self.lock.hold():
+            self._refresh()
+            now = time.time()
+            applied = {}
+            events = []
+            for user_id in user_ids:
+                record = self.users.get(user_id)
+                updates = modify(user_id, dict(record) if record is not None else None)
+                if updates:
+                    applied[user_id] = updates
+                    events.append({"t": now, "u": user_id, "f": copy.deepcopy(updates)})
+            if events:
+                self._append(events)
+            return applied
+
+    def delete_users(self, records: Dict[str, dict]) -> List[str]:
+        with self.lock.hold():
+            self._refresh()
+            now = time.time()
+            deleted = [user_id for user_id, record in records.items() if self.users.get(user_id) == record]
+            if deleted:
+                self._append([{"t": now, "u": user_id, "f": None} for user_id in deleted])
+            return deleted
+
+    def is_stale(self) -> bool:
+        return self.versions.is_stale()
+
+    def fingerprint(self) -> Optional[list]:
+        with self.lock.hold():
+            segment = self.snapshots()[-1][0]
+            return [self.versions.read(), segment, _stat_fingerprint(self._segment_path(segment))]
+
+    def assume_loaded(self) -> None:
+        self.versions.mark_loaded(self.versions.read())
+
+    def state_at(self, timestamp: float) -> dict:
+        """Rebuild {"users": {...}} as it was at a unix timestamp."""
+        with self.lock.hold():
+            snapshots = self.snapshots()
+            base = None
+            for snapshot in snapshots:
+                if snapshot[1] <= timestamp:
+                    base = snapshot
+            if base is None:
+                raise ValueError(f"The event log only goes back to {time.ctime(snapshots[0][1])}")
+            users = self._read_snapshot(*base).get("users", {})
+            for segment in range(base[0], snapshots[-1][0] + 1):
+                events, _ = self._read_events(segment)
+                for event in events:
+                    if event.get("t", 0.0) <= timestamp:
+                        self._apply(users, event)
+            return {"users": users}
+
+    def verify(self) -> dict:
+        errors = []
+        records = 0
+        with self.lock.hold():
+            for segment, timestamp in self.snapshots():
+                try:
+                    self._read_snapshot(segment, timestamp)
+                except ValueError as e:
+                    errors.append(f"{self._snapshot_path(segment, timestamp)}: {e}")
+                path = self._segment_path(segment)
+                if not os.path.exists(path):
+                    continue
+                with open(path, "rb") as f:
+                    for number, raw in enumerate(f, start=1):
+                        try:
+                            event = json.loads(raw)
+                            if not {"t", "u", "f"} <= event.keys():
+                                raise ValueError("missing t/u/f")
+                        except ValueError as e:
+                            errors.append(f"{path}:{number}: {e}")
+            self._refresh()
+            records = len(self.users)
+        return {"records": records, "errors": errors}
+
+
+BACKENDS = {
+    JsonFileBackend.name: JsonFileBackend,
+    SqliteBackend.name: SqliteBackend,
+    ShardedJsonBackend.name: ShardedJsonBackend,
+    SegmentBackend.name: SegmentBackend,
+    EventLogBackend.name: EventLogBackend,
+}
+
+
+def create_backend(name: str, path: str, codec: str = None, durable: bool = False) -> StorageBackend:
+    """Instantiate the storage backend registered under ``name``.
+
+    ``codec`` picks the file encoding for file-based backends; SQLite ignores it.
+    ``durable`` makes every write reach the disk (fsync) before it returns.
+    """
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    if codec and backend_class is not SqliteBackend:
+        return backend_class(path, codec=get_codec(codec), durable=durable)
+    return backend_class(path, durable=durable)
+
+
+def migrate_store(source: StorageBackend, destination: StorageBackend, batch_size: int = 500) -> int:
+    """Copy every user from one backend into another. Returns the number of users copied."""
+    copied = 0
+    batch = {}
+    for user_id, record in source.iter_users():
+        batch[user_id] = record
+        if len(batch) >= batch_size:
+            destination.update_users(batch)
+            copied += len(batch)
+            batch = {}
+    if batch:
+        destination.update_users(batch)
+        copied += len(batch)
+    logger.info(f"Migrated {copied} users from {source.name} to {destination.name}")
+    return copied
@@ -0,0 +1,100 @@
+# benchmarks/codec_benchmark.py
+"""Compare store codecs on synthetic data.
+
+Usage:
+    python -m benchmarks.codec_benchmark [--users 1000 10000 100000] [--history-days 120] [--json]
+
+For every available codec and store size this reports the time to save (encode +
+write) and load (read + decode) the whole store, and the resulting file size.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from app.utils.codec_utils import CODECS, dumps, loads
+from app.utils.history_utils import HistoryColumns, day_to_date, date_to_day
+from app.utils.schema_utils import SCHEMA_VERSION
+
+def make_store(user_count: int, history_days: int, seed: int = 42) -> dict:
+    """Build a synthetic {"users": {...}} store shaped like real bot data."""
+    rng = random.Random(seed)
+    first_day = date_to_day("2024-01-01")
+    users = {}
+    for index in range(user_count):
+        start_amount = round(rng.uniform(500, 50000), 2)
+        days = rng.randint(0, history_days)
+        balance = start_amount
+        entries = []
+        for offset in range(days):
+            balance *= 1 + rng.gauss(0.002, 0.02)
+            entries.append({"date": day_to_date(first_day + offset), "balance": round(balance, 2)})
+        users[str(100000000 + index)] = {
+            "name": f"User {index}",
+            "language": rng.choice(["en", "hi"]),
+            "currency": "₹",
+            "reminders": rng.random() < 0.8,
+            "history": HistoryColumns.from_entries(entries).encode(),
+            "history_archive": None,
+            "target": {
+                "start_amount": start_amount,
+                "target_amount": start_amount * 10,
+                "rate": rng.choice([1, 2, 5, 10]),
+                "mode": rng.choice(["daily", "monthly"]),
+            },
+            "stoploss": rng.choice([None, 10, 20]),
+            "start_date": "2024-01-01",
+            "awaiting": None,
+            "schema_version": SCHEMA_VERSION,
+        }
+    return {"users": users}
+
+def bench_codec(codec, data: dict, directory: str, repeat: int) -> dict:
+    """Time saving and loading ``data`` with one codec; best of ``repeat`` runs."""
+    path = os.path.join(directory, f"store.{codec.name}")
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with open(path, "wb") as f:
+            f.write(dumps(data, codec))
+        save_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            loaded = loads(f.read())
+        load_times.append(time.perf_counter() - started)
+    assert len(loaded["users"]) == len(data["users"])
+    return {
+        "codec": codec.name,
+        "save_ms": round(min(save_times) * 1000, 2),
+        "load_ms": round(min(load_times) * 1000, 2),
+        "size_bytes": os.path.getsize(path),
+    }
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark store codecs")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--history-days", type=int, default=120, help="Maximum history length per user")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for user_count in args.users:
+            data = make_store(user_count, args.history_days)
+            for codec in CODECS.values():
+                result = bench_codec(codec, data, directory, args.repeat)
+                result["users"] = user_count
+                results.append(result)
+                if not args.json:
+                    print(
+                        f"{user_count:>8} users  {codec.name:<12} save {result['save_ms']:>9.1f} ms  "
+                        f"load {result['load_ms']:>9.1f} ms  size {result['size_bytes'] / 1024:>10.1f} KiB"
+                    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
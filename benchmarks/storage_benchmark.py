@@ -0,0 +1,214 @@
+# benchmarks/storage_benchmark.py
+"""Measure how the data_utils storage API scales per backend.
+
+Usage:
+    python -m benchmarks.storage_benchmark [--backends json sqlite] [--users 1000 10000 100000]
+        [--history-days 30 365] [--ops 2000] [--cache] [--output results.json]
+
+Every (backend, store size, history length) case runs in a fresh process
+against a synthetic store in a temporary directory and times:
+
+    load      load_data() after a cold start (whole store)
+    save      save_data() of the whole store
+    status    get_user_data() for random users, as /status and /start do
+    close     commit_user_data() of one closing balance, as /close does
+    update    update_user_data() of one setting, as /settings does
+    reminder  rebuilding the 8 PM reminder recipient index
+    scan      iter_users() over every user, as broadcasts do
+
+Cases run without the user cache by default, so the per-user workloads hit the
+backend and the numbers compare backends. ``--cache`` adds a run of every case
+with the cache on next to the uncached one, to show what the cache saves.
+
+Per workload it reports p50/p99/mean latency in milliseconds and throughput in
+operations per second, plus the case's peak RSS. Results are printed as JSON
+(or written to ``--output``) together with the commit they were measured at,
+so runs from different commits can be compared directly.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from app.utils.data_utils import get_durability_mode, get_storage_codec
+from benchmarks.codec_benchmark import make_store
+
+BACKENDS = ["json", "sqlite", "sharded", "segment", "eventlog"]
+
+def percentile(samples: list, fraction: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(samples: list) -> dict:
+    """Latency percentiles in ms and throughput for a list of per-operation seconds."""
+    total = sum(samples)
+    return {
+        "ops": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "mean_ms": round(total / len(samples) * 1000, 4),
+        "ops_per_sec": round(len(samples) / total, 1) if total else None,
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+def run_case(backend_name: str, user_count: int, history_days: int, ops: int, repeat: int,
+             flush_interval: float, seed: int) -> dict:
+    """Run every workload for one case. Meant to run in its own process so RSS is per case."""
+    directory = tempfile.mkdtemp(prefix="storage-bench-")
+    try:
+        return _run_workloads(directory, backend_name, user_count, history_days, ops, repeat, flush_interval, seed)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def _run_workloads(directory: str, backend_name: str, user_count: int, history_days: int, ops: int, repeat: int,
+                   flush_interval: float, seed: int) -> dict:
+    # Keep every file the bot would create inside the scratch directory, and background jobs quiet
+    os.environ.update({
+        "HISTORY_LOG_FILE": os.path.join(directory, "history_log.jsonl"),
+        "HISTORY_ARCHIVE_DIR": os.path.join(directory, "history_archive"),
+        "USER_ARCHIVE_DIR": os.path.join(directory, "user_archive"),
+        "WARM_SNAPSHOT_FILE": "",
+        "HISTORY_TIER_INTERVAL": "0",
+    })
+    from app.utils import data_utils
+    from app.utils.history_utils import day_to_date, date_to_day
+    from app.utils.storage_backends import create_backend
+
+    extension = {"json": "user_data.json", "sqlite": "user_data.db"}.get(backend_name, backend_name)
+    path = os.path.join(directory, extension)
+    store = make_store(user_count, history_days, seed)
+    user_ids = list(store["users"])
+
+    backend = create_backend(backend_name, path, data_utils.get_storage_codec())
+    build_seconds = timed(backend.save_all, store)
+    backend.close()
+
+    rng = random.Random(seed)
+    results = {}
+
+    # Cold start: a new backend object, as after a restart
+    samples = []
+    for _ in range(repeat):
+        data_utils.set_backend(create_backend(backend_name, path, data_utils.get_storage_codec()))
+        samples.append(timed(data_utils.load_data))
+    results["load"] = summarize(samples)
+
+    data_utils.init_storage(flush_interval)
+    data = data_utils.load_data()
+    results["save"] = summarize([timed(data_utils.save_data, data) for _ in range(repeat)])
+    del data
+
+    results["status"] = summarize([timed(data_utils.get_user_data, rng.choice(user_ids)) for _ in range(ops)])
+
+    first_day = date_to_day("2025-01-01")
+    results["close"] = summarize([
+        timed(data_utils.commit_user_data, rng.choice(user_ids), {}, [(day_to_date(first_day + i), 1000.0 + i)])
+        for i in range(ops)
+    ])
+    results["update"] = summarize([
+        timed(data_utils.update_user_data, rng.choice(user_ids), {"stoploss": rng.choice([None, 10, 20])})
+        for _ in range(ops)
+    ])
+
+    def rebuild_reminder_index():
+        data_utils._invalidate_reminder_index()
+        data_utils.get_reminder_recipients()
+
+    results["reminder"] = summarize([timed(rebuild_reminder_index) for _ in range(repeat)])
+
+    def scan():
+        for _ in data_utils.iter_users():
+            pass
+
+    results["scan"] = summarize([timed(scan) for _ in range(repeat)])
+    data_utils.shutdown_storage()
+
+    return {
+        "backend": backend_name,
+        "users": user_count,
+        "history_days": history_days,
+        "cache": flush_interval > 0,
+        "build_s": round(build_seconds, 3),
+        "workloads": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark data_utils storage workloads per backend")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Store sizes to test (1000000 works but needs several GiB)")
+    parser.add_argument("--history-days", type=int, nargs="+", default=[30, 365],
+                        help="Maximum history length per user; each user gets a random length up to it")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per per-user workload")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each whole-store workload")
+    parser.add_argument("--cache", action="store_true",
+                        help="Also run every case with the user cache on, next to the uncached run")
+    parser.add_argument("--flush-interval", type=float, default=5.0,
+                        help="Cache flush interval for the --cache runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "durability": get_durability_mode(),
+        "codec": get_storage_codec(),
+        "results": [],
+    }
+    # 0 runs uncached: every read and write goes to the backend
+    flush_intervals = [0, args.flush_interval] if args.cache else [0]
+    context = multiprocessing.get_context("spawn")
+    for user_count in args.users:
+        for history_days in args.history_days:
+            for backend_name in args.backends:
+                for flush_interval in flush_intervals:
+                    print(f"Running {backend_name} with {user_count} users, up to {history_days} days of history"
+                          f"{', cached' if flush_interval else ''}...", file=sys.stderr)
+                    # A fresh process per case keeps peak RSS and caches from leaking between cases
+                    with context.Pool(1) as pool:
+                        result = pool.apply(run_case, (
+                            backend_name, user_count, history_days, args.ops, args.repeat, flush_interval, args.seed
+                        ))
+                    report["results"].append(result)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
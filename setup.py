@@ -32,6 +32,7 @@ setup(
     entry_points={
         "console_scripts": [
             "compounding-bot=app.main:main",
+            "compounding-storage=app.cli:main",
         ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,29 @@
+# tests/conftest.py
+import pytest
+from app.utils import data_utils
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Point data_utils at a fresh store under tmp_path and reset its module state.
+
+    Pick the backend with ``monkeypatch.setenv("STORAGE_BACKEND", ...)`` and start
+    the cache with ``data_utils.init_storage(...)`` inside the test.
+    """
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        "STORAGE_BACKEND": "json",
+        "DURABILITY_MODE": "interval",
+        "HISTORY_LOG_FILE": str(tmp_path / "history.log"),
+        "HISTORY_ARCHIVE_DIR": str(tmp_path / "history_archive"),
+        "USER_ARCHIVE_DIR": str(tmp_path / "user_archive"),
+        "WARM_SNAPSHOT_FILE": "",
+        "HISTORY_TIER_INTERVAL": "0",
+    }.items():
+        monkeypatch.setenv(name, value)
+    for name in ("_backend", "_cache", "_history_log", "_compactor", "_committer",
+                 "_history_archive", "_user_archive", "_reminder_index"):
+        monkeypatch.setattr(data_utils, name, None)
+    monkeypatch.setattr(data_utils, "_pending_history", {})
+    monkeypatch.setattr(data_utils, "_history_unsynced", False)
+    yield data_utils
+    data_utils.shutdown_storage()
@@ -0,0 +1,88 @@
+# tests/test_data_utils.py
+import pytest
+from app.utils.history_utils import HistoryLog
+from app.utils.storage_backends import create_backend
+
+TARGET = {"start_amount": 100.0, "target_amount": 200.0, "rate": 10.0, "mode": "daily"}
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "eventlog"])
+@pytest.mark.parametrize("durability", ["interval", "group"])
+def test_new_user_read_before_flush(storage, monkeypatch, backend, durability):
+    monkeypatch.setenv("STORAGE_BACKEND", backend)
+    monkeypatch.setenv("DURABILITY_MODE", durability)
+    storage.init_storage(60)
+
+    storage.commit_user_data("1", {"target": TARGET})
+    user_data = storage.get_user_data("1")
+    assert user_data["target"] == TARGET
+    assert user_data["reminders"] is True
+
+    storage.flush()
+    user_data = storage.get_user_data("1")
+    assert user_data["target"] == TARGET
+    assert user_data["reminders"] is True
+    assert storage.get_reminder_recipients() == {"1": "en"}
+
+@pytest.mark.parametrize("flush_interval", [0, 60])
+def test_new_records_are_stamped_with_schema_version(storage, flush_interval):
+    storage.init_storage(flush_interval)
+    storage.commit_user_data("1", {"name": "a"})
+    storage.append_history("2", "2026-10-01", 150.0)
+    storage.compact_history()
+    storage.flush()
+
+    for user_id in ("1", "2"):
+        record = storage.get_backend().get_user(user_id)
+        assert record["schema_version"] == storage.SCHEMA_VERSION
+        assert record["reminders"] is True
+
+def test_first_write_keeps_fields_stored_by_another_worker(storage):
+    storage.init_storage(60)
+    # Written by another worker after this one loaded its cache
+    storage.get_backend().update_users({"1": {"target": TARGET, "schema_version": storage.SCHEMA_VERSION}})
+
+    storage.commit_user_data("1", {"name": "a"})
+    storage.flush()
+
+    record = storage.get_backend().get_user("1")
+    assert record["target"] == TARGET
+    assert record["name"] == "a"
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "eventlog"])
+def test_reminder_index_sees_other_workers_writes(storage, monkeypatch, backend):
+    monkeypatch.setenv("STORAGE_BACKEND", backend)
+    storage.commit_user_data("1", {"target": TARGET})
+    storage.commit_user_data("2", {"target": TARGET})
+    assert storage.get_reminder_recipients() == {"1": "en", "2": "en"}
+
+    other_worker = create_backend(backend, storage.get_storage_path(backend))
+    other_worker.update_users({"1": {"reminders": False}})
+    # A single-user read in between must not hide the other worker's write
+    storage.get_user_data("2")
+    assert storage.get_reminder_recipients() == {"2": "en"}
+
+def test_archived_user_ids_leave_out_excluded_reasons(storage):
+    storage.commit_user_data("11", {"target": TARGET})
+    storage.commit_user_data("12", {"target": TARGET})
+    storage.commit_user_data("13", {"target": TARGET})
+    storage.archive_users(["11"], "inactive")
+    storage.archive_users(["12"], "blocked")
+
+    assert sorted(storage.get_archived_user_ids()) == ["11", "12"]
+    assert storage.get_archived_user_ids(exclude_reasons=("blocked",)) == ["11"]
+    # Restored users are hot again and no longer listed
+    storage.get_user_data("11")
+    assert storage.get_archived_user_ids(exclude_reasons=("blocked",)) == []
+
+def test_interval_flush_syncs_history_log(storage, monkeypatch):
+    synced = []
+    monkeypatch.setattr(HistoryLog, "sync", lambda log: synced.append(log.path))
+    storage.init_storage(60)
+
+    storage.flush()
+    assert synced == []
+    storage.append_history("1", "2026-10-01", 150.0)
+    storage.flush()
+    assert synced == [storage.get_history_log().path]
+    storage.flush()
+    assert len(synced) == 1
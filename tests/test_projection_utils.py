@@ -0,0 +1,33 @@
+# tests/test_projection_utils.py
+from app.utils.history_utils import HistoryColumns, date_to_day
+from app.utils.projection_utils import calculate_projection, days_to_reach
+
+TODAY = date_to_day("2026-10-01")
+
+def _user(rate, closes=()):
+    return {
+        "target": {"start_amount": 100.0, "target_amount": 200.0, "rate": rate, "mode": "daily"},
+        "start_date": "2026-10-01",
+        "history": HistoryColumns.from_entries([{"date": date, "balance": balance} for date, balance in closes]),
+    }
+
+def test_days_to_reach():
+    assert days_to_reach(200.0, 200.0, 0.01) == 0.0
+    assert days_to_reach(100.0, 200.0, 0.0) is None
+    assert round(days_to_reach(100.0, 200.0, 0.01)) == 69
+
+def test_projection_with_tiny_rate_is_never_reached():
+    result = calculate_projection(_user(0.0001), TODAY)
+    assert result["error"] is None
+    assert result["planned_days_left"] is None
+    assert result["planned_target_date"] is None
+    assert result["planned_finish_date"] is None
+
+def test_projection_with_near_flat_history_is_never_reached():
+    closes = [("2026-10-01", 100.0), ("2026-10-02", 100.000001), ("2026-10-03", 100.000002)]
+    result = calculate_projection(_user(10.0, closes), TODAY)
+    assert result["error"] is None
+    assert result["planned_finish_date"] is not None
+    assert result["realized_rate"] is not None
+    assert result["realized_days_left"] is None
+    assert result["realized_finish_date"] is None
@@ -0,0 +1,25 @@
+# tests/test_simulation_utils.py
+from app.config.constants import SIMULATION_DEFAULT_DAYS, SIMULATION_MAX_DAYS
+from app.utils.history_utils import HistoryColumns, date_to_day
+from app.utils.simulation_utils import run_simulation
+
+TODAY = date_to_day("2026-10-20")
+
+def _user(rate, target_amount):
+    balances = [100.0, 101.0, 100.5, 102.0, 101.5, 103.0, 102.5, 104.0]
+    entries = [{"date": f"2026-10-{day:02d}", "balance": balance} for day, balance in enumerate(balances, start=1)]
+    return {
+        "target": {"start_amount": 100.0, "target_amount": target_amount, "rate": rate, "mode": "daily"},
+        "start_date": "2026-10-01",
+        "history": HistoryColumns.from_entries(entries),
+    }
+
+def test_unreachable_plan_uses_default_horizon():
+    result = run_simulation(_user(0.0001, 200.0), TODAY, paths=100, seed=1)
+    assert result["error"] is None
+    assert result["horizon_days"] == SIMULATION_DEFAULT_DAYS
+
+def test_distant_plan_is_capped():
+    result = run_simulation(_user(5.0, 1000.0), TODAY, paths=100, seed=1)
+    assert result["error"] is None
+    assert result["horizon_days"] == SIMULATION_MAX_DAYS